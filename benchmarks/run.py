@@ -0,0 +1,231 @@
+"""LurkKit hot-path benchmarks. Run: python benchmarks/run.py [--quick] [--save FILE] [--compare FILE]
+
+Everything runs offline: synthetic log files, a fake psutil process table, in-memory sinks and
+alerters, and a local stand-in HTTP server.
+"""
+from __future__ import annotations
+import argparse, gc, http.server, json, logging, os, platform, random, statistics, sys, tempfile, threading, time, tracemalloc
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lurkkit.alert_manager import AlertManager
+from lurkkit.models import Alert, Metric, Severity
+from lurkkit.replay import MemoryAlerter, MemorySink
+from lurkkit.telemetry import MetricBuffer
+
+HOST = "bench-host"
+
+# Stand-ins
+_CpuTimes = namedtuple("_CpuTimes", "user system"); _MemInfo = namedtuple("_MemInfo", "rss")
+_IoCounters = namedtuple("_IoCounters", "read_bytes write_bytes")
+
+class FakeProcess:
+    def __init__(self, pid: int, name: str, rng: random.Random):
+        self.pid = pid; self._rss = rng.randint(1, 2048) * 1024 * 1024
+        self.info = {"pid": pid, "name": name, "cpu_times": _CpuTimes(rng.random() * 100, rng.random() * 10),
+                     "memory_info": _MemInfo(self._rss), "io_counters": _IoCounters(rng.randint(0, 1 << 30), 0)}
+    def cpu_percent(self, interval=None) -> float: return 1.0
+    def memory_info(self): return self.info["memory_info"]
+
+def fake_process_table(n: int, seed: int = 7) -> List[FakeProcess]:
+    rng = random.Random(seed); names = ["nginx", "gunicorn", "postgres", "python", "java", "sshd", "cron"]
+    return [FakeProcess(1000 + i, rng.choice(names), rng) for i in range(n)]
+
+def write_log(path: str, lines: int, hit_ratio: float, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    levels = ["ERROR", "WARNING", "CRITICAL"]
+    with open(path, "a") as f:
+        for i in range(lines):
+            lvl = rng.choice(levels) if rng.random() < hit_ratio else "INFO"
+            f.write(f"2024-02-23T10:00:{i % 60:02d} {lvl} app[{rng.randint(1, 9999)}]: request {i} handled in {rng.randint(1, 900)}ms\n")
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def do_GET(self):
+        body = b'{"status":"ok"}'
+        self.send_response(200); self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+    def log_message(self, *args): pass
+
+def local_http_server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler); srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+# Harness
+Op = Callable[[], object]
+
+class Latencies(list):
+    """Returned by an op that timed its own calls (e.g. per call across threads)."""
+
+def measure(name: str, unit: str, items: int, ops: Callable[[], Iterable[Op]], repeat: int = 5, min_ops: int = 200) -> Dict:
+    """Run ``ops()`` at least ``repeat`` times, timing each operation it yields (a collect(), a process() batch, ...).
+
+    Runs repeat (up to 50) until ``min_ops`` operations were timed, so p95/p99 are not just the slowest sample.
+    Work done by the generator between yields is untimed setup. An op may return ``Latencies`` it
+    measured itself; its wall time still counts towards the run.
+    Percentiles are over all operations; throughput is ``items`` over the median run's op time.
+    """
+    lat: List[float] = []; runs = []
+    while len(runs) < repeat or (len(lat) < min_ops and len(runs) < 50):
+        gc.collect(); total = 0.0
+        for op in ops():
+            t0 = time.perf_counter(); own = op(); dt = time.perf_counter() - t0
+            total += dt; lat.extend(own if isinstance(own, Latencies) else [dt])
+        runs.append(total)
+    tracemalloc.start()
+    for op in ops(): op()
+    _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    lat.sort(); med = statistics.median(runs)
+    pct = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1000
+    return {"name": name, "unit": unit, "items": items, "ops": len(lat), "throughput": items / med if med else 0.0,
+            "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "peak_kb": peak / 1024}
+
+def chunks(seq: list, size: int) -> List[list]:
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+def bench_line_protocol(n: int) -> Dict:
+    metrics = [Metric("system.disk", {"usage_percent": 42.5, "used_bytes": 123456789, "free_bytes": 987654321, "up": True},
+                      {"host": HOST, "mount": f"/mnt/{i % 50}", "device": f"/dev/sd{i % 8}"}) for i in range(n)]
+    batches = chunks(metrics, 1000)   # one op = one sink batch rendered
+    return measure("line_protocol", "metrics/s", n, lambda: [lambda b=b: [m.to_line_protocol() for m in b] for b in batches])
+
+def bench_log_tail(lines: int, hit_ratio: float, tmp: str, runs: int = 20) -> Dict:
+    from lurkkit.collectors.logs import LogCollector
+    path = os.path.join(tmp, "bench.log")
+    cfg  = {"files": [{"path": path, "patterns": [{"regex": "ERROR|CRITICAL", "severity": "critical"},
+                                                    {"regex": "WARNING", "severity": "warning", "alert": False},
+                                                    {"regex": r"handled in \d{3}ms", "severity": "info", "alert": False}]}]}
+    col  = LogCollector(cfg, HOST)
+    def ops():   # one op = one collect() over the lines written since the previous one
+        Path(path).write_text("start\n"); col._positions.clear(); col.collect()
+        for _ in range(runs):
+            write_log(path, lines // runs, hit_ratio); yield col.collect
+    return measure(f"log_tail[{hit_ratio:.0%} hits]", "lines/s", lines // runs * runs, ops)
+
+def bench_alert_manager(n: int) -> Dict:
+    alerter = MemoryAlerter()
+    alerts  = [Alert(f"process_cpu_worker_{i}", "CPU high", Severity.WARNING, "process", {"host": HOST}) for i in range(n)]
+    batches = [(b, {a.id for a in b}) for b in chunks(alerts, 100)]
+    def ops():   # one op = one collector run's process() batch; the second pass is all cooldown hits
+        alerter.sent.clear(); mgr = AlertManager([], [alerter], cooldown=300)
+        return [lambda b=b, ids=ids: mgr.process(b, ids) for b, ids in batches * 2]
+    return measure("alert_manager", "alerts/s", 2 * n, ops)
+
+def bench_alert_storm(n: int) -> Dict:
+    alerter = MemoryAlerter()
+    alerts  = [Alert(f"log_app_{i}", "boom", Severity.CRITICAL, "logs", {"host": HOST}) for i in range(n)]
+    def ops():   # process() batches, then the flush that builds and sends the digest
+        alerter.sent.clear(); mgr = AlertManager([], [alerter], cooldown=300, coalesce_window=60)
+        return [lambda b=b: mgr.process(b, set()) for b in chunks(alerts, 100)] + [mgr.flush]
+    return measure("alert_storm[coalesced]", "alerts/s", n, ops)
+
+def bench_metric_buffer(n: int, threads: int = 4) -> Dict:
+    batch = [Metric("system.cpu", {"usage_percent": 12.5}, {"host": HOST}) for _ in range(50)]
+    def run() -> Latencies:   # latency per add() call, under contention from the other threads
+        buf = MetricBuffer(MemorySink(), batch_size=500, flush_interval=9999); lat: List[List[float]] = []
+        def worker():
+            own = []; lat.append(own)
+            for _ in range(n // (threads * len(batch))):
+                t0 = time.perf_counter(); buf.add(batch); own.append(time.perf_counter() - t0)
+        ts = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in ts: t.start()
+        for t in ts: t.join()
+        buf.flush()
+        return Latencies(x for own in lat for x in own)
+    return measure(f"metric_buffer[{threads} threads]", "metrics/s", n, lambda: [run])
+
+def bench_process_collectors(pids: int, runs: int = 20) -> List[Dict]:
+    from lurkkit.collectors import process, top
+    table = fake_process_table(pids)
+    it    = lambda attrs=None: iter(table)
+    pcol  = process.ProcessCollector({"max_pid_series": 20, "watch": [{"name": n, "max_cpu": 90, "max_mem_mb": 1024}
+                                                                       for n in ("nginx", "gunicorn", "postgres")]}, HOST)
+    tcol  = top.TopProcessCollector({"k": 10}, HOST)
+    def top_ops():
+        for _ in range(runs):
+            tcol._prev_ts -= 1; yield tcol.collect
+    with mock.patch.object(process.psutil, "process_iter", it), mock.patch.object(top.psutil, "process_iter", it):
+        tcol.collect()
+        return [measure(f"process_collector[{pids} pids]", "procs/s", pids * runs, lambda: [pcol.collect] * runs),
+                measure(f"top_collector[{pids} pids]", "procs/s", pids * runs, top_ops)]
+
+def bench_rules(n_rules: int, n_metrics: int) -> Dict:
+    from lurkkit.rules import RuleEngine
+    eng = RuleEngine.from_config([{"name": f"disk_{i}", "measurement": "system.disk", "field": "usage_percent",
+                                   "tags": {"mount": f"/mnt/{i}"}, "warning": 80, "critical": 95} for i in range(n_rules)])
+    metrics = [Metric("system.disk", {"usage_percent": float(i % 100)}, {"host": HOST, "mount": f"/mnt/{i % n_rules}"})
+               for i in range(n_metrics)]
+    batches = chunks(metrics, 1000)   # one op = evaluating one collector run's metrics
+    return measure(f"rules[{n_rules} rules]", "metrics/s", n_metrics, lambda: [lambda b=b: eng.evaluate(b) for b in batches])
+
+def bench_http(checks: int) -> Dict:
+    from lurkkit.collectors.http import HttpCollector
+    srv = local_http_server()
+    try:
+        url  = f"http://127.0.0.1:{srv.server_address[1]}/health"
+        defs = [{"name": f"c{i}", "url": url, "timeout": 2, "expect_body": "ok"} for i in range(checks)]
+        col  = HttpCollector({"checks": defs}, HOST)
+        return measure(f"http_checks[{checks}]", "checks/s", checks, lambda: [lambda d=d: col._check(d) for d in defs])
+    finally:
+        srv.shutdown()
+
+def run_all(args) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        results.append(bench_line_protocol(args.metrics))
+        for ratio in args.hit_ratios: results.append(bench_log_tail(args.log_lines, ratio, tmp))
+        results.append(bench_alert_manager(args.alerts))
+        results.append(bench_alert_storm(args.alerts))
+        results.append(bench_metric_buffer(args.metrics))
+        results.extend(bench_process_collectors(args.pids))
+        results.append(bench_rules(args.rules, args.metrics))
+        results.append(bench_http(args.http_checks))
+    return results
+
+def report(results: List[Dict], baseline: Optional[Dict[str, Dict]] = None, tolerance: float = 0.2) -> int:
+    print(f"{'benchmark':<34} {'throughput':>16} {'ops':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KB':>9}" + ("   vs baseline" if baseline else ""))
+    regressions = 0
+    for r in results:
+        line = f"{r['name']:<34} {r['throughput']:>10,.0f} {r['unit']:<5} {r['ops']:>6,} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['peak_kb']:>9,.0f}"
+        base = (baseline or {}).get(r["name"])
+        if base and base.get("throughput"):
+            delta = r["throughput"] / base["throughput"] - 1
+            flag  = "  REGRESSION" if delta < -tolerance else ""
+            regressions += bool(flag); line += f"   {delta:+7.1%}{flag}"
+        print(line)
+    return regressions
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="LurkKit hot-path benchmarks")
+    ap.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    ap.add_argument("--log-lines", type=int, default=200_000)
+    ap.add_argument("--hit-ratios", type=float, nargs="+", default=[0.01, 0.5])
+    ap.add_argument("--pids", type=int, default=5_000)
+    ap.add_argument("--metrics", type=int, default=100_000)
+    ap.add_argument("--alerts", type=int, default=10_000)
+    ap.add_argument("--rules", type=int, default=2_000)
+    ap.add_argument("--http-checks", type=int, default=50)
+    ap.add_argument("--save", metavar="FILE", help="write results as a baseline JSON file")
+    ap.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop before flagging (default 0.2)")
+    ap.add_argument("--log-level", default="CRITICAL", help="agent log level during the run (default CRITICAL)")
+    args = ap.parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.CRITICAL))
+    if args.quick:
+        args.log_lines, args.pids, args.metrics, args.alerts, args.rules, args.http_checks = 5_000, 500, 5_000, 1_000, 200, 5
+    baseline = None
+    if args.compare:
+        baseline = {r["name"]: r for r in json.loads(Path(args.compare).read_text())["results"]}
+    results = run_all(args)
+    regressions = report(results, baseline, args.tolerance)
+    if args.save:
+        Path(args.save).write_text(json.dumps({"python": platform.python_version(), "machine": platform.machine(),
+                                               "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, indent=2))
+        print(f"Baseline saved: {args.save}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,13 @@ __author__  = "LurkKit Contributors"
 __license__ = "MIT"
 __url__     = "https://github.com/SREportal/lurkkit"
 
-from lurkkit.agent import LurkKitAgent
-from lurkkit.models import Alert, Metric, Severity
+from importlib import import_module
+
+# Resolved lazily so `lurkkit --version` and friends don't pay for the whole agent.
+_LAZY = {"LurkKitAgent": "lurkkit.agent", "Alert": "lurkkit.models", "Metric": "lurkkit.models", "Severity": "lurkkit.models"}
 
 __all__ = ["LurkKitAgent", "Alert", "Metric", "Severity", "__version__"]
+
+def __getattr__(name):
+    if name in _LAZY: return getattr(import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
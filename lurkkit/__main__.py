@@ -24,6 +24,13 @@ agent:
   interval: 30
   log_level: INFO
   log_file: ""
+  self_metrics: false       # emit lurkkit.internal.* metrics about the agent itself
+  self_metrics_interval: 60
+  profile_mode: cprofile    # on SIGUSR1: cprofile | tracemalloc
+  profile_duration: 30
+  profile_dir: /tmp
+  record: ""                # e.g. /var/lib/lurkkit/incident.lkrec — record collector output for --replay
+  record_max_mb: 256        # rotate to <record>.1 beyond this size
 
 telemetry:
   enabled: false
@@ -31,6 +38,8 @@ telemetry:
   url: "http://localhost:8086/write?db=lurkkit"
   statsd_host: "localhost"
   statsd_port: 8125
+  relay_host: "localhost"   # type: relay — stream to a `lurkkit --relay`
+  relay_port: 8094
   batch_size: 20
   flush_interval: 10
 
@@ -48,10 +57,16 @@ monitors:
       cpu_percent: 95
       memory_percent: 97
       disk_percent: 97
+    adaptive:               # sample faster (down to min_interval) near thresholds; also for processes/http
+      enabled: false
+      min_interval: 5
+      margin: 0.1
+      backoff: 1.5
 
   processes:
     enabled: false
     interval: 30
+    max_pid_series: 20      # per watch; extra PIDs roll up into pid=other
     watch:
       - name: nginx
         min_count: 1
@@ -62,9 +77,35 @@ monitors:
         min_count: 1
         critical: true
 
+  top:
+    enabled: false
+    interval: 30
+    k: 10
+    by: [cpu, rss, io]
+
+  cgroups:                  # cgroup v2: per container / systemd unit
+    enabled: false
+    interval: 30
+    root: /sys/fs/cgroup
+    max_depth: 3
+    rescan_interval: 300    # full tree walk; in between only changed directories are re-listed
+    include: ["system.slice/*.service", "kubepods.slice/*"]
+    exclude: ["*.mount", "*.socket"]
+    thresholds:             # per cgroup; 0 or absent = disabled
+      memory_percent: 90    # of memory.max
+      oom_kills: 1          # per interval
+      cpu_percent: 0        # 100 = one full core
+      memory_pressure: 0    # PSI some avg10
+    critical_overrides:
+      memory_percent: 97
+    overrides: []
+      # - match: "system.slice/postgresql*.service"
+      #   thresholds: {memory_percent: 80}
+
   http:
     enabled: false
     interval: 60
+    dns_cache_ttl: 0          # seconds to cache DNS answers (0 = resolve every probe)
     checks:
       - name: "App Health"
         url: "http://localhost:8080/health"
@@ -72,10 +113,14 @@ monitors:
         timeout: 5
         expect_status: 200
         severity: critical
+        keepalive: false      # reuse the connection across probes (warm-path latency)
+        # max_ms: {dns: 50, connect: 100, tls: 200, ttfb: 300, total: 1000}
 
   logs:
     enabled: false
     interval: 15
+    workers: 0              # >0 scans in a process pool, sharded by file (keeps the GIL free)
+    shard_mb: 8
     files:
       - path: /var/log/syslog
         tail_lines: 200
@@ -87,9 +132,42 @@ monitors:
             severity: warning
             alert: false
 
+rules: []
+  # - name: root_disk_filling
+  #   measurement: system.disk
+  #   field: usage_percent
+  #   tags: {mount: "/"}
+  #   op: ">="
+  #   warning: 80
+  #   critical: 95
+  #   for: 120          # seconds the condition must hold before firing
+  #   hysteresis: 5     # clear only once the value drops 5 below the level
+
+relay:                      # only used by `lurkkit --relay`
+  listen_host: 0.0.0.0
+  tcp_port: 8094            # line protocol over TCP (0 = off)
+  udp_port: 8089            # line protocol over UDP (0 = off)
+  statsd_port: 8125         # StatsD over UDP (0 = off)
+  upstream_url: "http://localhost:8086/write?db=lurkkit"
+  upstream_token: ""
+  workers: 0                # parser/forwarder processes; 0 = one per CPU
+  batch_size: 5000          # points per upstream write
+  flush_interval: 5
+  gzip: true
+  aggregate: false          # keep only the last value per series/field each flush
+  spool_dir: /var/lib/lurkkit/spool
+  spool_max_mb: 512
+
 alerting:
   cooldown: 300
   send_resolve: true
+  state_file: ""            # e.g. /var/lib/lurkkit/alert_state.json — keeps cooldowns across restarts
+  state_ttl: 86400
+  state_max_entries: 10000
+  snapshot_interval: 60
+  coalesce_window: 0        # seconds; >0 groups alerts by source/host/severity into digests
+  digest_max_lines: 10
+  rate_limit: {rate: 0, burst: 10}   # per alerter, messages/s (0 = unlimited); override per alerter
   paging_severities: [critical]
   non_paging_severities: [warning, info]
 
@@ -101,6 +179,7 @@ alerting:
     icon_emoji: ":cat2:"
     mention_on_critical: ""
     mention_on_warning: ""
+    rate_limit: {rate: 1, burst: 5}
 
   pagerduty:
     enabled: false
@@ -155,6 +234,9 @@ def main():
     parser.add_argument("--init",            action="store_true", help="Write sample config and exit")
     parser.add_argument("--status",          action="store_true", help="Print system status and exit")
     parser.add_argument("--validate",        action="store_true", help="Validate config and exit")
+    parser.add_argument("--relay",           action="store_true", help="Run as a fleet relay instead of an agent")
+    parser.add_argument("--replay",          metavar="FILE",      help="Replay a recording through the pipeline against stand-ins")
+    parser.add_argument("--speed",           default="1",         help="Replay speed: 1 = real time, N = N× faster, max = no waits")
     parser.add_argument("--log-level",       default=None,        help="DEBUG/INFO/WARNING/ERROR")
     parser.add_argument("--version", "-v",   action="store_true", help="Print version and exit")
     args = parser.parse_args()
@@ -177,16 +259,37 @@ def main():
     setup_logging(args.log_level or agent_cfg.get("log_level", "INFO"), agent_cfg.get("log_file") or None)
 
     if args.validate:
+        from lurkkit import registry
         print(f"Validating: {args.config or 'auto'}")
-        for key in ["slack", "pagerduty", "datadog", "opsgenie"]:
-            acfg = cfg.get("alerting", {}).get(key, {})
-            if acfg.get("enabled"):
-                has_creds = bool(acfg.get("webhook_url") or acfg.get("api_key") or acfg.get("routing_key"))
-                print(f"  {'✓' if has_creds else '✗'} {key}: {'ok' if has_creds else 'MISSING credentials'}")
+        for key, acfg in cfg.get("alerting", {}).items():
+            if not isinstance(acfg, dict) or not acfg.get("enabled"): continue
+            if key not in registry.ALERTERS and key not in registry.entry_points(registry.ALERTER_GROUP):
+                print(f"  ✗ {key}: unknown alerter"); continue
+            has_creds = bool(acfg.get("webhook_url") or acfg.get("api_key") or acfg.get("routing_key"))
+            print(f"  {'✓' if has_creds else '✗'} {key}: {'ok' if has_creds else 'MISSING credentials'}")
+        for key, ccfg in cfg.get("monitors", {}).items():
+            if isinstance(ccfg, dict) and ccfg.get("enabled") and key not in registry.COLLECTORS \
+                    and key not in registry.entry_points(registry.COLLECTOR_GROUP):
+                print(f"  ✗ {key}: unknown collector")
+        if cfg.get("rules"):
+            from lurkkit.rules import RuleEngine
+            n = len(RuleEngine.from_config(cfg["rules"]))
+            print(f"  {'✓' if n == len(cfg['rules']) else '✗'} rules: {n}/{len(cfg['rules'])} valid")
         print(f"{GREEN}Config OK{RESET}"); return
 
+    if args.replay:
+        from lurkkit.replay import Replayer, format_report
+        try: speed = None if args.speed == "max" else float(args.speed)
+        except ValueError: parser.error(f"--speed must be a number or 'max', got {args.speed!r}")
+        print(f"Replaying {args.replay} at {'max' if speed is None else f'{speed:g}x'} speed...")
+        print(format_report(Replayer(cfg, speed).run(args.replay))); return
+
+    if args.relay:
+        from lurkkit.relay import Relay
+        Relay(cfg.get("relay", {})).run(); return
+
     from lurkkit.agent import LurkKitAgent
-    LurkKitAgent(cfg).start()
+    LurkKitAgent(cfg, config_path=args.config).start()
 
 if __name__ == "__main__":
     main()
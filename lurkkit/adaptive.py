@@ -0,0 +1,46 @@
+from __future__ import annotations
+import time
+from typing import Dict, Optional, Tuple
+
+class AdaptiveInterval:
+    """Chooses each collector's next interval from how close its values are to their thresholds.
+
+    A value is *hot* when it sits within ``margin`` (a fraction of the threshold) of its warning
+    level, or when its current rate of change would carry it into that band within ``max_s``.
+    Any hot value drops the interval to ``min_s``; otherwise it relaxes by ``backoff`` per run
+    back up to ``max_s``.
+    """
+    def __init__(self, min_s: float, max_s: float, margin: float = 0.1, backoff: float = 1.5):
+        self.max_s = float(max_s); self.min_s = min(float(min_s), self.max_s)
+        self.margin = float(margin); self.backoff = max(1.0, float(backoff))
+        self.current = self.max_s
+        self._hot = False
+        self._last: Dict[str, Tuple[float, float]] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Dict], interval: float) -> Optional["AdaptiveInterval"]:
+        if not cfg or not cfg.get("enabled", False): return None
+        return cls(cfg.get("min_interval", 5), interval, cfg.get("margin", 0.1), cfg.get("backoff", 1.5))
+
+    def observe(self, key: str, value: float, threshold: float, higher_is_worse: bool = True) -> bool:
+        """Record one sample of a thresholded value; returns True if it made this run hot."""
+        if not threshold or threshold <= 0: return False
+        now  = time.monotonic()
+        band = threshold * (1 - self.margin) if higher_is_worse else threshold * (1 + self.margin)
+        dist = band - value if higher_is_worse else value - band
+        prev = self._last.get(key); self._last[key] = (now, value)
+        hot  = dist <= 0
+        if not hot and prev and now > prev[0]:
+            slope = (value - prev[1]) / (now - prev[0])
+            hot   = (slope if higher_is_worse else -slope) * self.max_s >= dist
+        self._hot |= hot
+        return hot
+
+    def next(self) -> float:
+        if self._hot: self.current = self.min_s
+        else:         self.current = min(self.max_s, self.current * self.backoff)
+        self._hot = False
+        if len(self._last) > 64:
+            cutoff = time.monotonic() - 3 * self.max_s
+            self._last = {k: v for k, v in self._last.items() if v[0] >= cutoff}
+        return self.current
@@ -1,55 +1,78 @@
 from __future__ import annotations
-import logging, signal, socket, threading, time
-from typing import Dict, List, Optional
+import copy, logging, signal, socket, threading, time
+from typing import Dict, List, Optional, Tuple
+from lurkkit import registry
 from lurkkit.alert_manager import AlertManager
-from lurkkit.alerters import DatadogAlerter, OpsGenieAlerter, PagerDutyAlerter, SlackAlerter
 from lurkkit.alerters.base import BaseAlerter
-from lurkkit.collectors import HttpCollector, LogCollector, ProcessCollector, SystemCollector
 from lurkkit.collectors.base import BaseCollector
 from lurkkit.config import cfg_get, load_config
+from lurkkit.rules import RuleEngine
+from lurkkit.selfmon import profiler, stats
 from lurkkit.telemetry import MetricBuffer, make_sink
 
 log = logging.getLogger(__name__)
 
 class CollectorThread(threading.Thread):
     def __init__(self, name: str, collector: BaseCollector, buffer: MetricBuffer,
-                 alert_mgr: AlertManager, checked_ids: set):
+                 alert_mgr: AlertManager, rules: Optional[RuleEngine] = None):
         super().__init__(name=f"lurkkit-{name}", daemon=True)
-        self.collector = collector; self.buffer = buffer
-        self.alert_mgr = alert_mgr; self.checked_ids = checked_ids
+        self.key = name; self.collector = collector; self.buffer = buffer
+        self.alert_mgr = alert_mgr; self.rules = rules
+        self.recorder = None
         self._stop = threading.Event()
 
     def stop(self) -> None: self._stop.set()
 
+    def run_once(self) -> None:
+        # Only ids checked during this run may be resolved by it, so one collector never clears another's alerts.
+        metrics, alerts = profiler.run(self.collector.collect)
+        if self.recorder: self.recorder.record(self.key, metrics, alerts)
+        checked: set = set()
+        if self.rules: alerts = alerts + self.rules.evaluate(metrics, checked, self.collector.adaptive)
+        self.buffer.add(metrics)
+        self.alert_mgr.process(alerts, checked)
+
     def run(self) -> None:
         log.debug(f"Collector started: {self.name} (interval={self.collector.interval}s)")
         while not self._stop.is_set():
-            try:
-                metrics, alerts = self.collector.collect()
-                self.buffer.add(metrics)
-                self.alert_mgr.process(alerts, self.checked_ids)
+            t0 = time.perf_counter()
+            try: self.run_once()
             except Exception as e:
+                stats.incr("collector", "errors", collector=self.key)
                 log.error(f"Collector {self.name} error: {e}", exc_info=True)
-            self._stop.wait(timeout=self.collector.interval)
+            elapsed = time.perf_counter() - t0
+            stats.timing("collector", elapsed, collector=self.key)
+            if elapsed > self.collector.interval:
+                stats.incr("collector", "overruns", collector=self.key)
+                log.debug(f"Collector {self.name} overran its interval ({elapsed:.1f}s > {self.collector.interval}s)")
+            wait = self.collector.next_interval()
+            if self.collector.adaptive: stats.gauge("collector", "interval_s", wait, collector=self.key)
+            self._stop.wait(timeout=wait)
+        self.collector.close()
 
 class LurkKitAgent:
-    def __init__(self, cfg: Dict):
+    def __init__(self, cfg: Dict, config_path: Optional[str] = None):
         self.cfg      = cfg
+        self.config_path = config_path
         self.hostname = cfg_get(cfg, "agent", "host_tag") or socket.gethostname()
         self._threads: List[CollectorThread] = []
         self._buffer:    Optional[MetricBuffer]  = None
         self._alert_mgr: Optional[AlertManager]  = None
+        self._rules:     Optional[RuleEngine]    = None
         self._running    = False
-        self._checked_ids: set = set()
+        self._reload_requested = False
+        self._recorder = None
+        self._alerters:   Dict[str, Tuple[Dict, BaseAlerter]] = {}
+        self._collectors: Dict[str, Tuple[Dict, CollectorThread]] = {}
 
     @classmethod
     def from_config(cls, path: Optional[str] = None) -> "LurkKitAgent":
-        return cls(load_config(path))
+        return cls(load_config(path), config_path=path)
 
     def register_collector(self, name: str, collector: BaseCollector) -> "LurkKitAgent":
         if self._buffer is None: self._build()
-        t = CollectorThread(name, collector, self._buffer, self._alert_mgr, self._checked_ids)
-        self._threads.append(t)
+        t = CollectorThread(name, collector, self._buffer, self._alert_mgr, self._rules)
+        t.recorder = self._recorder; self._threads.append(t)
         return self
 
     def start(self) -> None:
@@ -59,47 +82,199 @@ class LurkKitAgent:
         for t in self._threads: t.start()
         signal.signal(signal.SIGINT,  self._shutdown)
         signal.signal(signal.SIGTERM, self._shutdown)
-        while self._running: time.sleep(1)
+        if hasattr(signal, "SIGUSR1"): signal.signal(signal.SIGUSR1, self._profile)
+        if hasattr(signal, "SIGHUP"):  signal.signal(signal.SIGHUP,  self._request_reload)
+        while self._running:
+            time.sleep(1)
+            if self._reload_requested:
+                self._reload_requested = False
+                try: self.reload()
+                except Exception as e: log.error(f"Config reload failed: {e}", exc_info=True)
 
     def stop(self) -> None:
         self._running = False
         for t in self._threads: t.stop()
         for t in self._threads: t.join(timeout=5)
-        if self._buffer: self._buffer.flush()
+        if self._buffer: self._buffer.flush(); self._buffer.close()
+        if self._alert_mgr: self._alert_mgr.flush(); self._alert_mgr.save_state()
+        if self._recorder: self._recorder.close()
         log.info("LurkKit stopped.")
 
+    def reload(self, new_cfg: Optional[Dict] = None) -> None:
+        """Apply a new config in place, restarting only the collectors, alerters and sink that changed.
+
+        Everything the new config needs is built first; if any of it fails the running config is kept.
+        The metric buffer, alert state and collector state (log offsets, rate baselines) carry over.
+        """
+        if new_cfg is None:
+            try: new_cfg = load_config(self.config_path)
+            except SystemExit:  # load_config exits on unreadable config; keep running the old one
+                log.error("Config reload aborted: keeping the running config"); return
+        if self._buffer is None:
+            self.cfg = new_cfg; self._build(); return
+        try: plan = self._stage(new_cfg)
+        except Exception as e:
+            log.error(f"Config reload aborted, keeping the running config: {e}", exc_info=True); return
+        self.cfg = new_cfg; self.hostname = plan["hostname"]; changed = plan["changed"]
+        if "telemetry" in plan:
+            self._buffer.reconfigure(*plan["telemetry"])
+            log.info("Reload: telemetry sink rebuilt (buffered metrics kept)")
+        if "alerting" in plan:
+            (paging, non_paging, limits, self._alerters), options = plan["alerting"]
+            self._alert_mgr.reconfigure(paging, non_paging, limits, **options)
+        if "rules" in plan:
+            rules = plan["rules"]; rules.inherit(self._rules); self._rules = rules
+            for t in self._threads: t.rules = rules
+            log.info(f"Reload: {len(rules)} rules loaded")
+        if "agent" in changed:
+            agent_cfg = new_cfg.get("agent", {})
+            logging.getLogger().setLevel(getattr(logging, str(agent_cfg.get("log_level", "INFO")).upper(), logging.INFO))
+            self._configure_selfmon(agent_cfg); self._set_recorder(plan["recorder"])
+        self._apply_collectors(*plan["collectors"])
+        log.info(f"Config reloaded ({', '.join(changed) or 'no top-level changes'})")
+
+    def _stage(self, cfg: Dict) -> Dict:
+        """Build the components a new config needs without touching the running agent; raises on any error."""
+        changed  = [k for k in ("agent", "telemetry", "alerting", "rules") if self.cfg.get(k) != cfg.get(k)]
+        hostname = cfg_get(cfg, "agent", "host_tag") or socket.gethostname()
+        plan: Dict = {"changed": changed, "hostname": hostname}
+        if "telemetry" in changed:
+            tel_cfg = cfg.get("telemetry", {})
+            plan["telemetry"] = (make_sink(tel_cfg), int(tel_cfg.get("batch_size", 20)), float(tel_cfg.get("flush_interval", 10)))
+        if "alerting" in changed:
+            alert_cfg = cfg.get("alerting", {})
+            plan["alerting"] = (self._make_alerters(alert_cfg), self._alert_mgr_options(alert_cfg))
+        if "rules" in changed:
+            plan["rules"] = RuleEngine.from_config(cfg.get("rules", []))
+        if "agent" in changed:
+            plan["recorder"] = self._make_recorder(cfg.get("agent", {}))
+        plan["collectors"] = self._plan_collectors(cfg, hostname, force=hostname != self.hostname)
+        return plan
+
     def _build(self) -> None:
         if self._buffer is not None: return
         tel_cfg   = self.cfg.get("telemetry", {})
         alert_cfg = self.cfg.get("alerting", {})
-        mon_cfg   = self.cfg.get("monitors", {})
-        agent_cfg = self.cfg.get("agent", {})
         self._buffer = MetricBuffer(make_sink(tel_cfg),
                                     batch_size=tel_cfg.get("batch_size", 20),
                                     flush_interval=tel_cfg.get("flush_interval", 10))
-        paging: List[BaseAlerter]     = []
-        non_paging: List[BaseAlerter] = []
-        for key, cls, is_paging in [("pagerduty", PagerDutyAlerter, True), ("opsgenie", OpsGenieAlerter, True),
-                                     ("slack", SlackAlerter, False), ("datadog", DatadogAlerter, False)]:
-            acfg = alert_cfg.get(key, {})
-            if acfg.get("enabled", False):
-                (paging if is_paging else non_paging).append(cls(acfg))
-                log.info(f"Alerter: {key} ({'paging' if is_paging else 'non-paging'})")
+        paging, non_paging, limits, self._alerters = self._make_alerters(alert_cfg)
         if not paging and not non_paging:
             log.warning("No alerters configured — alerts will only be logged")
-        self._alert_mgr = AlertManager(paging, non_paging,
-                                       paging_severities=alert_cfg.get("paging_severities", ["critical"]),
-                                       cooldown=alert_cfg.get("cooldown", 300),
-                                       send_resolve=alert_cfg.get("send_resolve", True))
+        self._alert_mgr = AlertManager(paging, non_paging, rate_limits=limits, **self._alert_mgr_options(alert_cfg))
+        self._rules = RuleEngine.from_config(self.cfg.get("rules", []))
+        if self._rules: log.info(f"Rules: {len(self._rules)} loaded")
+        self._configure_selfmon(self.cfg.get("agent", {})); self._set_recorder(self._make_recorder(self.cfg.get("agent", {})))
+        self._apply_collectors(*self._plan_collectors(self.cfg, self.hostname))
+
+    @staticmethod
+    def _alert_mgr_options(alert_cfg: Dict) -> Dict:
+        return dict(paging_severities=alert_cfg.get("paging_severities", ["critical"]),
+                    cooldown=float(alert_cfg.get("cooldown", 300)),
+                    send_resolve=alert_cfg.get("send_resolve", True),
+                    state_ttl=float(alert_cfg.get("state_ttl", 86400)),
+                    state_max_entries=int(alert_cfg.get("state_max_entries", 10000)),
+                    state_file=alert_cfg.get("state_file", ""),
+                    snapshot_interval=float(alert_cfg.get("snapshot_interval", 60)),
+                    coalesce_window=float(alert_cfg.get("coalesce_window", 0)),
+                    digest_max_lines=int(alert_cfg.get("digest_max_lines", 10)))
+
+    def _make_alerters(self, alert_cfg: Dict) -> Tuple[List[BaseAlerter], List[BaseAlerter], Dict[BaseAlerter, Tuple[float, float]],
+                                                       Dict[str, Tuple[Dict, BaseAlerter]]]:
+        paging: List[BaseAlerter]     = []
+        non_paging: List[BaseAlerter] = []
+        limits: Dict[BaseAlerter, Tuple[float, float]] = {}
+        current: Dict[str, Tuple[Dict, BaseAlerter]] = {}
+        for key, acfg in alert_cfg.items():
+            if not isinstance(acfg, dict) or not acfg.get("enabled", False): continue
+            prev = self._alerters.get(key)
+            if prev and prev[0] == acfg: alerter = prev[1]
+            else:
+                cls = registry.load_alerter(key)
+                if cls is None:
+                    log.error(f"Unknown alerter '{key}' (known: {', '.join(registry.known_alerters())})"); continue
+                alerter = cls(acfg)
+                log.info(f"Alerter: {key} ({'paging' if acfg.get('paging', cls.paging) else 'non-paging'})")
+            current[key] = (copy.deepcopy(acfg), alerter)
+            (paging if acfg.get("paging", alerter.paging) else non_paging).append(alerter)
+            rl = {**alert_cfg.get("rate_limit", {}), **acfg.get("rate_limit", {})}
+            limits[alerter] = (float(rl.get("rate", 0)), float(rl.get("burst", 10)))
+        return paging, non_paging, limits, current
+
+    def _configure_selfmon(self, agent_cfg: Dict) -> None:
+        stats.enabled = bool(agent_cfg.get("self_metrics", False))
+        profiler.configure(agent_cfg.get("profile_mode", "cprofile"), agent_cfg.get("profile_duration", 30),
+                           agent_cfg.get("profile_dir", "/tmp"))
+
+    def _make_recorder(self, agent_cfg: Dict):
+        path, max_mb = agent_cfg.get("record", ""), agent_cfg.get("record_max_mb", 256)
+        if not path: return None
+        if self._recorder and (self._recorder.path, self._recorder.max_bytes) == (path, int(float(max_mb) * 1024 * 1024)):
+            return self._recorder
+        from lurkkit.replay import Recorder
+        return Recorder(path, max_mb)
+
+    def _set_recorder(self, recorder) -> None:
+        if recorder is self._recorder: return
+        if self._recorder: self._recorder.close()
+        self._recorder = recorder
+        for t in self._threads: t.recorder = recorder
+
+    @staticmethod
+    def _wanted_collectors(cfg: Dict) -> Dict[str, Dict]:
+        agent_cfg = cfg.get("agent", {})
         global_interval = agent_cfg.get("interval", 30)
-        for tname, cls, key in [("system", SystemCollector, "system"), ("processes", ProcessCollector, "processes"),
-                                  ("http", HttpCollector, "http"), ("logs", LogCollector, "logs")]:
-            ccfg = mon_cfg.get(key, {})
-            if not ccfg.get("enabled", False): continue
-            ccfg.setdefault("interval", global_interval)
-            t = CollectorThread(tname, cls(ccfg, self.hostname), self._buffer, self._alert_mgr, self._checked_ids)
-            self._threads.append(t)
-            log.info(f"Collector: {tname} (interval={ccfg['interval']}s)")
+        wanted: Dict[str, Dict] = {}
+        for tname, ccfg in cfg.get("monitors", {}).items():
+            if not isinstance(ccfg, dict) or not ccfg.get("enabled", False): continue
+            wanted[tname] = dict(copy.deepcopy(ccfg), interval=ccfg.get("interval", global_interval))
+        if agent_cfg.get("self_metrics", False):
+            wanted["internal"] = {"interval": agent_cfg.get("self_metrics_interval", 60)}
+        return wanted
+
+    def _plan_collectors(self, cfg: Dict, hostname: str, force: bool = False) -> Tuple[List[str], List[Tuple[str, Dict, BaseCollector]]]:
+        """Collectors to remove, and new instances for those added or changed (not started yet)."""
+        wanted  = self._wanted_collectors(cfg)
+        removed = [k for k in self._collectors if k not in wanted]
+        built: List[Tuple[str, Dict, BaseCollector]] = []
+        for tname, ccfg in wanted.items():
+            prev = self._collectors.get(tname)
+            if prev and prev[0] == ccfg and not force: continue
+            if tname == "internal":
+                from lurkkit.collectors.internal import SelfCollector
+                cls = SelfCollector
+            else:
+                cls = registry.load_collector(tname)
+            if cls is None:
+                log.error(f"Unknown collector '{tname}' (known: {', '.join(registry.known_collectors())})"); continue
+            built.append((tname, ccfg, cls(copy.deepcopy(ccfg), hostname)))
+        return removed, built
+
+    def _apply_collectors(self, removed: List[str], built: List[Tuple[str, Dict, BaseCollector]]) -> None:
+        for tname in removed:
+            _, t = self._collectors.pop(tname); self._retire(t)
+            log.info(f"Collector removed: {tname}")
+        for tname, ccfg, collector in built:
+            prev = self._collectors.get(tname)
+            if prev:
+                self._retire(prev[1]); collector.inherit(prev[1].collector)
+            t = CollectorThread(tname, collector, self._buffer, self._alert_mgr, self._rules)
+            t.recorder = self._recorder
+            self._collectors[tname] = (ccfg, t); self._threads.append(t)
+            if self._running: t.start()
+            log.info(f"Collector{' restarted' if prev else ''}: {tname} (interval={ccfg['interval']}s)")
+
+    def _retire(self, t: CollectorThread) -> None:
+        t.stop()
+        if t.is_alive(): t.join(timeout=30)
+        if t in self._threads: self._threads.remove(t)
+
+    def _request_reload(self, sig, frame) -> None:
+        log.info("SIGHUP received, reloading config...")
+        self._reload_requested = True
+
+    def _profile(self, sig, frame) -> None:
+        profiler.trigger()
 
     def _shutdown(self, sig, frame) -> None:
         log.info(f"Signal {sig} received, shutting down...")
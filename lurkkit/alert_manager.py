@@ -1,54 +1,105 @@
 from __future__ import annotations
 import logging, time
 from threading import Lock
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
+from lurkkit.alert_state import AlertStateStore
 from lurkkit.alerters.base import BaseAlerter
+from lurkkit.coalescer import Coalescer, send_timed
 from lurkkit.models import Alert, Severity
+from lurkkit.selfmon import stats
 
 log = logging.getLogger(__name__)
 
 class AlertManager:
     def __init__(self, paging_alerters: List[BaseAlerter], non_paging_alerters: List[BaseAlerter],
-                 paging_severities: List[str] = None, cooldown: int = 300, send_resolve: bool = True):
+                 paging_severities: List[str] = None, cooldown: int = 300, send_resolve: bool = True,
+                 state_ttl: float = 86400, state_max_entries: int = 10000, state_file: str = "",
+                 snapshot_interval: float = 60, coalesce_window: float = 0, digest_max_lines: int = 10,
+                 rate_limits: Optional[Dict[BaseAlerter, Tuple[float, float]]] = None):
         self.paging_alerters     = paging_alerters
         self.non_paging_alerters = non_paging_alerters
         self.paging_severities   = set(paging_severities or [Severity.CRITICAL])
         self.cooldown            = cooldown
         self.send_resolve        = send_resolve
-        self._last_fired: Dict[str, float] = {}
-        self._firing: Set[str]             = set()
-        self._lock                         = Lock()
+        self.state_file          = state_file
+        self.snapshot_interval   = snapshot_interval
+        self._state              = AlertStateStore(ttl=max(state_ttl, cooldown), max_entries=state_max_entries)
+        self._lock               = Lock()
+        if state_file: self._state.load(state_file)
+        self._last_snapshot      = time.time()
+        self._coalescer          = self._make_coalescer(coalesce_window, rate_limits, digest_max_lines)
 
-    def process(self, new_alerts: List[Alert], checked_ids: Set[str]) -> None:
+    def reconfigure(self, paging_alerters: List[BaseAlerter], non_paging_alerters: List[BaseAlerter],
+                    rate_limits: Optional[Dict[BaseAlerter, Tuple[float, float]]] = None, *,
+                    paging_severities: List[str] = None, cooldown: int = 300, send_resolve: bool = True,
+                    state_ttl: float = 86400, state_max_entries: int = 10000, state_file: str = "",
+                    snapshot_interval: float = 60, coalesce_window: float = 0, digest_max_lines: int = 10) -> None:
+        """Swap alerters and policy in place; cooldown and firing state are kept."""
+        self.flush()
         with self._lock:
-            now     = time.time()
+            self.paging_alerters     = paging_alerters
+            self.non_paging_alerters = non_paging_alerters
+            self.paging_severities   = set(paging_severities or [Severity.CRITICAL])
+            self.cooldown            = cooldown
+            self.send_resolve        = send_resolve
+            self.state_file          = state_file
+            self.snapshot_interval   = snapshot_interval
+            self._state.ttl          = max(state_ttl, cooldown); self._state.max_entries = state_max_entries
+            self._coalescer          = self._make_coalescer(coalesce_window, rate_limits, digest_max_lines)
+
+    def _make_coalescer(self, window: float, rate_limits, max_lines: int) -> Optional[Coalescer]:
+        if window > 0 or any(r > 0 for r, _ in (rate_limits or {}).values()):
+            return Coalescer(self._targets, window, rate_limits, max_lines, paging=self.paging_alerters)
+        return None
+
+    def process(self, new_alerts: List[Alert], checked_ids: Set[str], now: Optional[float] = None) -> None:
+        with self._lock:
+            now     = time.time() if now is None else now
             new_ids = {a.id for a in new_alerts}
             for alert in new_alerts:
-                last = self._last_fired.get(alert.id, 0)
-                if now - last >= self.cooldown:
-                    self._last_fired[alert.id] = now
-                    self._firing.add(alert.id)
+                last = self._state.last_fired(alert.id); prev = self._state.severity(alert.id)
+                # Escalation (e.g. a rule going warning → critical under one id) is not held back by the cooldown.
+                if now - last >= self.cooldown or (prev and Severity.rank(alert.severity) > Severity.rank(prev)):
+                    self._state.fire(alert.id, now, alert.severity)
+                    stats.incr("alerts", "fired")
                     self._dispatch(alert)
                     log.warning(str(alert))
                 else:
+                    stats.incr("alerts", "suppressed")
                     log.debug(f"Suppressed (cooldown): {alert.id}")
             if self.send_resolve:
-                for aid in (self._firing & checked_ids) - new_ids:
-                    self._firing.discard(aid)
-                    self._last_fired.pop(aid, None)
-                    self._dispatch(Alert(name=aid.split(":", 1)[-1], message=f"Alert '{aid}' resolved",
-                                        severity=Severity.INFO, source="lurkkit", resolved=True))
+                for aid in (self._state.firing & checked_ids) - new_ids:
+                    self._state.resolve(aid)
+                    stats.incr("alerts", "resolved")
+                    source, _, name = aid.partition(":")   # same id as the trigger, so paging dedup keys/aliases close
+                    self._dispatch(Alert(name=name, message=f"Alert '{aid}' resolved",
+                                        severity=Severity.INFO, source=source, resolved=True))
                     log.info(f"[RESOLVED] {aid}")
+            self._state.expire(now)
+            stats.gauge("alerts", "state_entries", len(self._state))
+            if self.state_file and now - self._last_snapshot >= self.snapshot_interval:
+                self._state.snapshot(self.state_file); self._last_snapshot = now
 
-    def _dispatch(self, alert: Alert) -> None:
+    def save_state(self) -> None:
+        if not self.state_file: return
+        with self._lock:
+            self._state.snapshot(self.state_file); self._last_snapshot = time.time()
+
+    def flush(self) -> None:
+        if self._coalescer: self._coalescer.flush(drain=True)
+
+    def _targets(self, alert: Alert) -> List[BaseAlerter]:
         targets = []
         if alert.severity in self.paging_severities or alert.resolved:
             targets.extend(self.paging_alerters)
         targets.extend(self.non_paging_alerters)
-        for alerter in targets:
-            try: alerter.send(alert)
-            except Exception as e: log.error(f"{alerter.__class__.__name__} error: {e}")
+        return targets
+
+    def _dispatch(self, alert: Alert) -> None:
+        if self._coalescer:
+            self._coalescer.add(alert); return
+        for alerter in self._targets(alert): send_timed(alerter, alert)
 
     @property
     def firing_count(self) -> int:
-        return len(self._firing)
+        return len(self._state.firing)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+import heapq, json, logging, os, time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+class AlertStateStore:
+    """Cooldown and firing state per alert id, bounded by TTL and entry count.
+
+    Expiry order is kept in a min-heap of ``(last_fired, id)``; entries superseded by a later
+    fire are skipped lazily when they reach the top, so eviction never scans the whole store.
+    """
+    VERSION = 1
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 10000):
+        self.ttl = float(ttl); self.max_entries = int(max_entries)
+        self._last: Dict[str, float]         = {}
+        self._severity: Dict[str, str]       = {}
+        self._firing: Set[str]               = set()
+        self._heap: List[Tuple[float, str]]  = []
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    @property
+    def firing(self) -> Set[str]:
+        return self._firing
+
+    def last_fired(self, aid: str) -> float:
+        return self._last.get(aid, 0.0)
+
+    def severity(self, aid: str) -> str:
+        """Severity the alert last fired at ("" if unknown)."""
+        return self._severity.get(aid, "")
+
+    def fire(self, aid: str, now: float, severity: str = "") -> None:
+        self._last[aid] = now; self._firing.add(aid)
+        if severity: self._severity[aid] = severity
+        heapq.heappush(self._heap, (now, aid))
+        self.expire(now)
+
+    def resolve(self, aid: str) -> None:
+        self._firing.discard(aid); self._last.pop(aid, None); self._severity.pop(aid, None)
+
+    def expire(self, now: float) -> int:
+        cutoff, evicted = now - self.ttl, 0
+        heap = self._heap
+        while heap and (heap[0][0] <= cutoff or len(self._last) > self.max_entries):
+            ts, aid = heapq.heappop(heap)
+            if self._last.get(aid) != ts: continue
+            del self._last[aid]; self._firing.discard(aid); self._severity.pop(aid, None); evicted += 1
+        if len(heap) > 2 * len(self._last) + 64:
+            self._heap = [(ts, aid) for aid, ts in self._last.items()]; heapq.heapify(self._heap)
+        if evicted: log.debug(f"Alert state: evicted {evicted} entries ({len(self._last)} left)")
+        return evicted
+
+    def snapshot(self, path: str) -> None:
+        target = Path(path); tmp = target.with_name(target.name + ".tmp")
+        data = {"version": self.VERSION, "saved_at": time.time(),
+                "last_fired": self._last, "firing": sorted(self._firing), "severity": self._severity}
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w") as f: json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, target)
+        except OSError as e: log.warning(f"Cannot save alert state to {path}: {e}")
+
+    def load(self, path: str, now: Optional[float] = None) -> int:
+        try:
+            with open(path) as f: data = json.load(f)
+        except FileNotFoundError: return 0
+        except (OSError, ValueError) as e:
+            log.warning(f"Cannot load alert state from {path}: {e}"); return 0
+        if data.get("version") != self.VERSION: return 0
+        now = time.time() if now is None else now
+        firing = set(data.get("firing", [])); severity = data.get("severity", {})
+        for aid, ts in data.get("last_fired", {}).items():
+            if now - ts >= self.ttl: continue
+            self._last[aid] = float(ts)
+            if aid in firing: self._firing.add(aid)
+            if aid in severity: self._severity[aid] = severity[aid]
+        self._heap = [(ts, aid) for aid, ts in self._last.items()]; heapq.heapify(self._heap)
+        self.expire(now)
+        log.info(f"Alert state: restored {len(self._last)} entries from {path}")
+        return len(self._last)
@@ -1,7 +1,12 @@
-from lurkkit.alerters.base import BaseAlerter
-from lurkkit.alerters.slack import SlackAlerter
-from lurkkit.alerters.pagerduty import PagerDutyAlerter
-from lurkkit.alerters.datadog import DatadogAlerter
-from lurkkit.alerters.opsgenie import OpsGenieAlerter
+from importlib import import_module
 
-__all__ = ["BaseAlerter", "SlackAlerter", "PagerDutyAlerter", "DatadogAlerter", "OpsGenieAlerter"]
+# Submodules are imported on first attribute access so enabling one alerter doesn't import them all.
+_LAZY = {"BaseAlerter": "lurkkit.alerters.base", "SlackAlerter": "lurkkit.alerters.slack",
+         "PagerDutyAlerter": "lurkkit.alerters.pagerduty", "DatadogAlerter": "lurkkit.alerters.datadog",
+         "OpsGenieAlerter": "lurkkit.alerters.opsgenie"}
+
+__all__ = list(_LAZY)
+
+def __getattr__(name):
+    if name in _LAZY: return getattr(import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,23 +1,29 @@
 from __future__ import annotations
-import json, logging, urllib.error, urllib.request
+import json, logging
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 from lurkkit.models import Alert
+from lurkkit.selfmon import stats
 
 log = logging.getLogger(__name__)
 
 class BaseAlerter(ABC):
+    paging: bool = False
+
     @abstractmethod
     def send(self, alert: Alert) -> None: ...
 
     def _post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None, timeout: int = 5) -> Optional[bytes]:
+        import urllib.error, urllib.request
         data = json.dumps(payload).encode()
         hdrs = {"Content-Type": "application/json", **(headers or {})}
         req  = urllib.request.Request(url, data=data, headers=hdrs, method="POST")
         try:
             with urllib.request.urlopen(req, timeout=timeout) as resp: return resp.read()
         except urllib.error.HTTPError as e:
+            stats.incr("alerter", "failures", alerter=self.__class__.__name__)
             log.error(f"{self.__class__.__name__} HTTP {e.code}: {e.read().decode()[:200]}")
         except Exception as e:
+            stats.incr("alerter", "failures", alerter=self.__class__.__name__)
             log.error(f"{self.__class__.__name__} failed: {e}")
         return None
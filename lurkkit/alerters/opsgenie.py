@@ -7,6 +7,7 @@ from lurkkit.models import Alert, Severity
 log = logging.getLogger(__name__)
 
 class OpsGenieAlerter(BaseAlerter):
+    paging = True
     def __init__(self, cfg: Dict):
         self.api_key  = cfg.get("api_key", "")
         base          = "api.eu.opsgenie.com" if cfg.get("region") == "eu" else "api.opsgenie.com"
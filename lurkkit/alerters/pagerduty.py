@@ -7,6 +7,7 @@ from lurkkit.models import Alert, Severity
 log = logging.getLogger(__name__)
 
 class PagerDutyAlerter(BaseAlerter):
+    paging = True
     ENDPOINT = "https://events.pagerduty.com/v2/enqueue"
 
     def __init__(self, cfg: Dict):
@@ -0,0 +1,109 @@
+from __future__ import annotations
+import dataclasses, logging, threading, time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from lurkkit.alerters.base import BaseAlerter
+from lurkkit.models import Alert, Severity
+from lurkkit.selfmon import stats
+
+log = logging.getLogger(__name__)
+
+def send_timed(alerter: BaseAlerter, alert: Alert) -> None:
+    name = alerter.__class__.__name__
+    with stats.timer("alerter", alerter=name):
+        try: alerter.send(alert)
+        except Exception as e:
+            stats.incr("alerter", "failures", alerter=name); log.error(f"{name} error: {e}")
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate); self.burst = max(1.0, float(burst))
+        self._tokens = self.burst; self._last = time.monotonic()
+
+    def take(self, n: float = 1.0) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate); self._last = now
+        if self._tokens < n: return False
+        self._tokens -= n; return True
+
+def digest(alerts: List[Alert], max_lines: int = 10) -> Alert:
+    """Fold alerts sharing source, host, severity and state into one message."""
+    first = alerts[0]; n = len(alerts)
+    lines = [str(a) for a in alerts[:max_lines]]
+    if n > len(lines): lines.append(f"+{n - len(lines)} more")
+    state = "resolved" if first.resolved else first.severity
+    return Alert(f"digest_{first.source}_{first.severity}", f"{n} {state} {first.source} alerts:\n" + "\n".join(lines),
+                 first.severity, first.source, {"host": first.tags.get("host", ""), "count": str(n)}, first.resolved)
+
+class Coalescer:
+    """Groups alerts over a short window and delivers one message per group to each non-paging alerter.
+
+    ``paging`` alerters always get each alert on its own: their incidents are keyed by the alert id,
+    and a digest or summary would open a page that no resolve ever matches.
+
+    Every alerter sits behind a token bucket. For non-paging alerters, messages that find the bucket
+    empty are counted and reported as "+N more" on the next message that alerter does get, or in a
+    standalone summary once tokens return. Paging traffic is never dropped: it is held, one entry per
+    alert id (a later trigger or resolve replaces the held one), and released as tokens return.
+    """
+    def __init__(self, route: Callable[[Alert], List[BaseAlerter]], window: float = 0,
+                 limits: Optional[Dict[BaseAlerter, Tuple[float, float]]] = None, max_lines: int = 10,
+                 paging: Iterable[BaseAlerter] = ()):
+        self.route = route; self.window = float(window); self.max_lines = max_lines; self.paging = set(paging)
+        self._buckets: Dict[BaseAlerter, TokenBucket] = {a: TokenBucket(r, b) for a, (r, b) in (limits or {}).items() if r > 0}
+        self._pending: Dict[Tuple[str, str, str, bool], List[Alert]] = {}
+        self._dropped: Dict[BaseAlerter, int] = {}
+        self._held: Dict[BaseAlerter, "OrderedDict[str, Alert]"] = {a: OrderedDict() for a in self.paging if a in self._buckets}
+        self._lock  = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, alert: Alert) -> None:
+        targets = self.route(alert)
+        if self.window <= 0:
+            self._deliver(alert, targets); return
+        self._deliver(alert, [a for a in targets if a in self.paging])
+        if all(a in self.paging for a in targets): return
+        key = (alert.source, alert.tags.get("host", ""), alert.severity, alert.resolved)
+        with self._lock:
+            self._pending.setdefault(key, []).append(alert)
+            if self._timer is None: self._schedule()
+
+    def flush(self, drain: bool = False) -> None:
+        """Deliver pending groups and what the buckets now allow; ``drain`` also sends all held paging traffic."""
+        with self._lock:
+            groups, self._pending = list(self._pending.values()), {}
+            if self._timer: self._timer.cancel(); self._timer = None
+        for group in groups:
+            self._deliver(group[0] if len(group) == 1 else digest(group, self.max_lines),
+                          [a for a in self.route(group[0]) if a not in self.paging])
+        with self._lock:
+            summaries = [(a, self._dropped.pop(a)) for a in list(self._dropped) if self._buckets[a].take()]
+            released  = []
+            for alerter, held in self._held.items():
+                while held and (drain or self._buckets[alerter].take()): released.append((alerter, held.popitem(last=False)[1]))
+            if self._timer is None and (self._dropped or any(self._held.values())): self._schedule()
+        for alerter, alert in released: send_timed(alerter, alert)
+        for alerter, n in summaries:
+            send_timed(alerter, Alert("rate_limited", f"+{n} more alerts suppressed by rate limit", Severity.WARNING, "lurkkit"))
+
+    def _schedule(self) -> None:
+        self._timer = threading.Timer(max(self.window, 1.0), self.flush)
+        self._timer.daemon = True; self._timer.start()
+
+    def _deliver(self, alert: Alert, targets: List[BaseAlerter]) -> None:
+        count = int(alert.tags.get("count", 1)) if alert.name.startswith("digest_") else 1
+        for alerter in targets:
+            bucket = self._buckets.get(alerter)
+            with self._lock:
+                held = self._held.get(alerter)
+                if held is not None:
+                    if held or not bucket.take():   # queued behind earlier paging traffic, in order
+                        held.pop(alert.id, None); held[alert.id] = alert
+                        if self._timer is None: self._schedule()
+                        log.debug(f"{alerter.__class__.__name__} rate limited, holding: {alert.id}"); continue
+                elif bucket and not bucket.take():
+                    self._dropped[alerter] = self._dropped.get(alerter, 0) + count
+                    if self._timer is None: self._schedule()
+                    log.debug(f"{alerter.__class__.__name__} rate limited: {alert.id}"); continue
+                dropped = self._dropped.pop(alerter, 0)
+            send_timed(alerter, dataclasses.replace(alert, message=f"{alert.message}\n+{dropped} more (rate limited)") if dropped else alert)
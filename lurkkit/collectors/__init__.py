@@ -1,7 +1,13 @@
-from lurkkit.collectors.base import BaseCollector
-from lurkkit.collectors.system import SystemCollector
-from lurkkit.collectors.process import ProcessCollector
-from lurkkit.collectors.http import HttpCollector
-from lurkkit.collectors.logs import LogCollector
+from importlib import import_module
 
-__all__ = ["BaseCollector", "SystemCollector", "ProcessCollector", "HttpCollector", "LogCollector"]
+# Submodules are imported on first attribute access so enabling one collector doesn't import them all.
+_LAZY = {"BaseCollector": "lurkkit.collectors.base", "SystemCollector": "lurkkit.collectors.system",
+         "ProcessCollector": "lurkkit.collectors.process", "HttpCollector": "lurkkit.collectors.http",
+         "LogCollector": "lurkkit.collectors.logs", "TopProcessCollector": "lurkkit.collectors.top",
+         "CgroupCollector": "lurkkit.collectors.cgroup"}
+
+__all__ = list(_LAZY)
+
+def __getattr__(name):
+    if name in _LAZY: return getattr(import_module(_LAZY[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,30 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Dict, List, Tuple
+from lurkkit.adaptive import AdaptiveInterval
 from lurkkit.models import Alert, Metric
 
 class BaseCollector(ABC):
     def __init__(self, cfg: Dict, hostname: str):
         self.cfg = cfg; self.hostname = hostname
         self.interval = int(cfg.get("interval", 30))
+        self.adaptive = AdaptiveInterval.from_config(cfg.get("adaptive"), self.interval)
 
     @abstractmethod
     def collect(self) -> Tuple[List[Metric], List[Alert]]: ...
 
+    def inherit(self, previous: "BaseCollector") -> None:
+        """Carry runtime state over from the instance this one replaces on config reload."""
+
+    def close(self) -> None:
+        """Release resources (worker pools, sockets) once the collector thread stops."""
+
+    def next_interval(self) -> float:
+        return self.adaptive.next() if self.adaptive else self.interval
+
+    def _track(self, key: str, value: float, threshold: float, higher_is_worse: bool = True) -> None:
+        """Feed a thresholded value to the adaptive interval, if enabled."""
+        if self.adaptive: self.adaptive.observe(key, value, threshold, higher_is_worse)
+
     def _base_tags(self, **extra: str) -> Dict[str, str]:
         return {"host": self.hostname, **extra}
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import fnmatch, logging, os, time
+from typing import Dict, List, Optional, Tuple
+from lurkkit.collectors.base import BaseCollector
+from lurkkit.models import Alert, Metric, Severity
+
+log = logging.getLogger(__name__)
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f: return f.read()
+    except OSError: return None
+
+def _kv(text: Optional[str]) -> Dict[str, int]:
+    """``key value`` per line (cpu.stat, memory.events)."""
+    out = {}
+    for line in (text or "").splitlines():
+        k, _, v = line.partition(" ")
+        if v.isdigit(): out[k] = int(v)
+    return out
+
+def _io(text: Optional[str]) -> Dict[str, int]:
+    """io.stat summed over devices: ``MAJ:MIN rbytes=N wbytes=N rios=N wios=N ...``."""
+    out: Dict[str, int] = {}
+    for line in (text or "").splitlines():
+        for item in line.split()[1:]:
+            k, _, v = item.partition("=")
+            if v.isdigit(): out[k] = out.get(k, 0) + int(v)
+    return out
+
+def _pressure(text: Optional[str]) -> Dict[str, float]:
+    """``some avg10=0.00 avg60=0.00 avg300=0.00 total=N`` / ``full ...`` → {some_avg10: .., some_total: ..}."""
+    out = {}
+    for line in (text or "").splitlines():
+        kind, *items = line.split()
+        for item in items:
+            k, _, v = item.partition("=")
+            try: out[f"{kind}_{k}"] = float(v)
+            except ValueError: pass
+    return out
+
+class CgroupCollector(BaseCollector):
+    """Per-cgroup (container, systemd unit) CPU, memory, IO and PSI from the cgroup v2 hierarchy.
+
+    The directory tree is cached; each run only stats the known directories and re-lists the
+    ones whose mtime changed, with a full walk every ``rescan_interval`` seconds.
+    """
+    _RESOURCES = ("cpu", "memory", "io")
+
+    def __init__(self, cfg, hostname):
+        super().__init__(cfg, hostname)
+        self.root = cfg.get("root", "/sys/fs/cgroup"); self.max_depth = int(cfg.get("max_depth", 3))
+        self.rescan_interval = float(cfg.get("rescan_interval", 300))
+        self.include = list(cfg.get("include") or ["*"]); self.exclude = list(cfg.get("exclude") or [])
+        self._dirs: Dict[str, int] = {}; self._selected: List[str] = []; self._last_walk = 0.0
+        self._prev: Dict[str, Tuple[float, Dict[str, float]]] = {}
+        self._limits: Dict[str, Tuple[Dict, Dict]] = {}
+
+    def inherit(self, previous: BaseCollector) -> None:
+        if isinstance(previous, CgroupCollector) and previous.root == self.root: self._prev = previous._prev
+
+    def collect(self) -> Tuple[List[Metric], List[Alert]]:
+        if not os.path.isfile(os.path.join(self.root, "cgroup.controllers")):
+            log.debug(f"{self.root} is not a cgroup v2 hierarchy"); return [], []
+        self._refresh()
+        metrics, alerts = [], []; now = time.monotonic(); seen = {}
+        for rel in self._selected:
+            counters = self._sample(rel, metrics, alerts, now)
+            if counters is not None: seen[rel] = (now, counters)
+        self._prev = seen
+        return metrics, alerts
+
+    # Tree cache
+    def _refresh(self) -> None:
+        now = time.monotonic(); changed = False
+        if not self._dirs or now - self._last_walk >= self.rescan_interval:
+            self._dirs = {}; self._walk("", 0); self._last_walk = now; changed = True
+        else:
+            for rel, mtime in list(self._dirs.items()):
+                if rel not in self._dirs: continue
+                try: st = os.stat(os.path.join(self.root, rel))
+                except OSError: self._forget(rel); changed = True; continue
+                if st.st_mtime_ns != mtime: self._walk(rel, rel.count("/") + 1 if rel else 0); changed = True
+        if changed:
+            self._selected = [r for r in sorted(self._dirs) if r and self._wanted(r)]
+            self._limits = {}
+
+    def _walk(self, rel: str, depth: int) -> None:
+        path = os.path.join(self.root, rel)
+        try:
+            self._dirs[rel] = os.stat(path).st_mtime_ns
+            children = [e.name for e in os.scandir(path) if e.is_dir(follow_symlinks=False)]
+        except OSError: self._forget(rel); return
+        prefix = f"{rel}/" if rel else ""
+        current = {prefix + c for c in children}
+        for gone in [d for d in self._dirs if d.startswith(prefix) and d and d != rel and "/" not in d[len(prefix):] and d not in current]:
+            self._forget(gone)
+        if depth >= self.max_depth: return
+        for child in current:
+            if child not in self._dirs: self._walk(child, depth + 1)
+
+    def _forget(self, rel: str) -> None:
+        for d in [d for d in self._dirs if d == rel or d.startswith(f"{rel}/")]: del self._dirs[d]
+
+    def _wanted(self, rel: str) -> bool:
+        return any(fnmatch.fnmatchcase(rel, p) for p in self.include) and not any(fnmatch.fnmatchcase(rel, p) for p in self.exclude)
+
+    # Sampling
+    def _sample(self, rel: str, metrics: List[Metric], alerts: List[Alert], now: float) -> Optional[Dict[str, float]]:
+        base = os.path.join(self.root, rel)
+        cpu = _kv(_read(os.path.join(base, "cpu.stat")))
+        if not cpu and not os.path.isdir(base): return None
+        mem_cur = _read(os.path.join(base, "memory.current")); mem_max = _read(os.path.join(base, "memory.max"))
+        events  = _kv(_read(os.path.join(base, "memory.events"))); io = _io(_read(os.path.join(base, "io.stat")))
+        psi     = {r: _pressure(_read(os.path.join(base, f"{r}.pressure"))) for r in self._RESOURCES}
+        counters = {f"cpu.{k}": v for k, v in cpu.items()}
+        counters.update({f"io.{k}": v for k, v in io.items()}); counters.update({f"events.{k}": v for k, v in events.items()})
+        counters.update({f"psi.{r}.{k}": v for r, p in psi.items() for k, v in p.items() if k.endswith("_total")})
+        prev = self._prev.get(rel); dt = now - prev[0] if prev else 0.0
+        def rate(key: str) -> Optional[float]:
+            if not dt or key not in counters or key not in prev[1]: return None
+            d = counters[key] - prev[1][key]
+            return d / dt if d >= 0 else None
+        tags = self._base_tags(cgroup=rel, name=os.path.basename(rel))
+        thresh, crit = self._limits_for(rel)
+        values: Dict[str, float] = {}
+        # CPU (usage_usec per second → percent of one core)
+        fields = {k: v for k, v in (("usage_percent", rate("cpu.usage_usec")), ("user_percent", rate("cpu.user_usec")),
+                                   ("system_percent", rate("cpu.system_usec")), ("throttled_percent", rate("cpu.throttled_usec"))) if v is not None}
+        fields = {k: v / 1e4 for k, v in fields.items()}
+        if "nr_throttled" in cpu: fields["nr_throttled"] = cpu["nr_throttled"]
+        if fields: metrics.append(Metric("cgroup.cpu", fields, tags))
+        if "usage_percent" in fields: values["cpu_percent"] = fields["usage_percent"]
+        # Memory
+        if mem_cur is not None and mem_cur.strip().isdigit():
+            fields = {"current_bytes": int(mem_cur)}
+            if mem_max and mem_max.strip().isdigit():
+                fields["max_bytes"] = int(mem_max); fields["usage_percent"] = values["memory_percent"] = int(mem_cur) / int(mem_max) * 100
+            for ev in ("oom", "oom_kill", "max", "high"):
+                if prev and f"events.{ev}" in counters and f"events.{ev}" in prev[1]:
+                    fields[f"{ev}_events"] = max(0, counters[f"events.{ev}"] - prev[1][f"events.{ev}"])
+            if "oom_kill_events" in fields: values["oom_kills"] = fields["oom_kill_events"]
+            metrics.append(Metric("cgroup.memory", fields, tags))
+        # IO
+        fields = {f"{k}_per_s": rate(f"io.{k}") for k in ("rbytes", "wbytes", "rios", "wios")}
+        fields = {k: v for k, v in fields.items() if v is not None}
+        if fields: metrics.append(Metric("cgroup.io", fields, tags))
+        # Pressure (PSI)
+        for res, p in psi.items():
+            if not p: continue
+            fields = {k: v for k, v in p.items() if not k.endswith("_total")}
+            for kind in ("some", "full"):
+                r = rate(f"psi.{res}.{kind}_total")
+                if r is not None: fields[f"{kind}_stall_percent"] = r / 1e4
+            metrics.append(Metric("cgroup.pressure", fields, dict(tags, resource=res)))
+            if "some_avg10" in p: values[f"{res}_pressure"] = p["some_avg10"]
+        for key, value in values.items(): self._threshold(alerts, rel, key, value, thresh, crit, tags)
+        return counters
+
+    def _limits_for(self, rel: str) -> Tuple[Dict, Dict]:
+        hit = self._limits.get(rel)
+        if hit is None:
+            thresh = dict(self.cfg.get("thresholds") or {}); crit = dict(self.cfg.get("critical_overrides") or {})
+            for ov in self.cfg.get("overrides") or []:
+                if fnmatch.fnmatchcase(rel, ov.get("match", "")):
+                    thresh.update(ov.get("thresholds") or {}); crit.update(ov.get("critical_overrides") or {})
+            hit = self._limits[rel] = (thresh, crit)
+        return hit
+
+    def _threshold(self, alerts: List[Alert], rel: str, key: str, value: float, thresh: Dict, crit: Dict, tags: Dict[str, str]) -> None:
+        w = float(thresh.get(key) or 0); c = float(crit.get(key) or 0)
+        if w: self._track(f"{rel}:{key}", value, w)
+        sev = Severity.CRITICAL if c and value >= c else Severity.WARNING if w and value >= w else None
+        if sev is None: return
+        limit = c if sev == Severity.CRITICAL else w
+        alerts.append(Alert(f"cgroup_{key}_{rel.replace('/', '_')}", f"cgroup {rel}: {key} {value:.1f} ({sev}: {limit:g})",
+                            sev, "cgroup", tags))
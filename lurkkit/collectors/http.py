@@ -1,36 +1,189 @@
 from __future__ import annotations
-import logging, re, time, urllib.error, urllib.request
-from typing import Dict, List, Tuple
+import http.client, logging, re, socket, ssl, threading, time, urllib.error, urllib.request
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
 from lurkkit.collectors.base import BaseCollector
 from lurkkit.models import Alert, Metric, Severity
+from lurkkit.selfmon import stats
 
 log = logging.getLogger(__name__)
 
+PHASES     = ("dns", "connect", "tls", "ttfb", "total")
+_REDIRECTS = (301, 302, 303, 307, 308)
+
+class Resolver:
+    """getaddrinfo with an optional TTL cache (``ttl`` <= 0 resolves every time).
+
+    getaddrinfo cannot be interrupted, so lookups with a ``timeout`` run in a daemon thread that
+    is abandoned if it overruns; a hung resolver then fails one check instead of stalling the rest.
+    """
+    def __init__(self, ttl: float = 0):
+        self.ttl = float(ttl); self._cache: Dict[Tuple[str, int], Tuple[float, list]] = {}
+
+    def resolve(self, host: str, port: int, timeout: Optional[float] = None) -> list:
+        now = time.monotonic(); hit = self._cache.get((host, port))
+        if hit and hit[0] > now: return hit[1]
+        addrs = self._lookup(host, port, timeout)
+        if self.ttl > 0: self._cache[(host, port)] = (now + self.ttl, addrs)
+        return addrs
+
+    @staticmethod
+    def _lookup(host: str, port: int, timeout: Optional[float]) -> list:
+        try: return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM, flags=socket.AI_NUMERICHOST)
+        except socket.gaierror:
+            if not timeout: return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        box: list = []
+        def run():
+            try: box.append(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+            except Exception as e: box.append(e)
+        t = threading.Thread(target=run, name=f"lurkkit-dns-{host}", daemon=True); t.start(); t.join(timeout)
+        if not box: raise socket.timeout(f"DNS lookup of {host} timed out after {timeout:g}s")
+        if isinstance(box[0], Exception): raise box[0]
+        return box[0]
+
+class _Timing:
+    __slots__ = PHASES + ("reused", "proxied")
+    def __init__(self):
+        for p in PHASES: setattr(self, p, 0.0)
+        self.reused = 0; self.proxied = False
+    def fields(self, tls: bool) -> Dict[str, float]:
+        if self.proxied: return {"ttfb_ms": self.ttfb, "response_ms": self.total}   # dns/connect/tls happen at the proxy
+        f = {f"{p}_ms": getattr(self, p) for p in PHASES if p != "total" and (p != "tls" or tls)}
+        f["response_ms"] = self.total
+        return f
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs): return None   # surface 3xx to the check's own redirect loop
+
 class HttpCollector(BaseCollector):
+    def __init__(self, cfg, hostname):
+        super().__init__(cfg, hostname)
+        self._resolver = Resolver(cfg.get("dns_cache_ttl", 0))
+        self._conns: Dict[str, Tuple[Tuple[str, str, int], http.client.HTTPConnection]] = {}
+        self._proxies = urllib.request.getproxies()
+
+    def inherit(self, previous: BaseCollector) -> None:
+        if isinstance(previous, HttpCollector) and previous._resolver.ttl == self._resolver.ttl: self._resolver = previous._resolver
+
+    def close(self) -> None:
+        for _, conn in self._conns.values(): conn.close()
+        self._conns.clear()
+
     def collect(self) -> Tuple[List[Metric], List[Alert]]:
         metrics, alerts = [], []
         for check in self.cfg.get("checks", []):
-            m, a = self._check(check); metrics.extend(m); alerts.extend(a)
+            with stats.timer("check", collector="http", check=check.get("name", check.get("url", "unknown"))):
+                m, a = self._check(check)
+            metrics.extend(m); alerts.extend(a)
         return metrics, alerts
 
     def _check(self, check):
         name = check.get("name", check.get("url", "unknown")); url = check.get("url", "")
-        timeout = int(check.get("timeout", 5)); expect = int(check.get("expect_status", 200))
+        timeout = float(check.get("timeout", 5)); expect = int(check.get("expect_status", 200))
         body_re = check.get("expect_body", ""); severity = check.get("severity", Severity.CRITICAL)
         tags = self._base_tags(endpoint=name.replace(" ", "_"))
-        start = time.time(); ok = False; status = 0; error = ""
+        timing = _Timing(); ok = False; status = 0; error = ""; redirects = 0
+        keepalive = bool(check.get("keepalive", False)); follow = int(check.get("max_redirects", 5)) if check.get("follow_redirects", True) else 0
+        start = time.perf_counter()
         try:
-            req = urllib.request.Request(url, method=check.get("method", "GET").upper(), headers=check.get("headers", {}))
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                status = resp.status; body = resp.read(4096).decode("utf-8", errors="replace")
-                elapsed = (time.time() - start) * 1000
-                if status != expect: error = f"Expected {expect}, got {status}"
-                elif body_re and not re.search(body_re, body): error = f"Body mismatch: {body_re!r}"
-                else: ok = True
-        except urllib.error.HTTPError as e:
-            elapsed = (time.time() - start) * 1000; status = e.code; error = f"HTTP {e.code}"
+            while True:
+                status, headers, body = self._request(name if keepalive and not redirects else None, url, check, timeout, timing)
+                location = headers.get("Location")
+                if status not in _REDIRECTS or not location or redirects >= follow: break
+                url = urljoin(url, location); redirects += 1
+            if status != expect: error = f"HTTP {status}" if status >= 400 else f"Expected {expect}, got {status}"
+            elif body_re and not re.search(body_re, body): error = f"Body mismatch: {body_re!r}"
+            else: ok = True
         except Exception as e:
-            elapsed = (time.time() - start) * 1000; error = str(e)
-        metrics = [Metric("http.check", {"status_code": status, "response_ms": elapsed, "up": 1 if ok else 0}, tags)]
-        alerts  = [] if ok else [Alert(f"http_down_{name.lower().replace(' ','_')}", f"'{name}' DOWN — {error}", severity, "http", tags)]
+            error = str(e) or type(e).__name__
+            if keepalive: self._drop(name)
+        timing.total = (time.perf_counter() - start) * 1000
+        fields = {"status_code": status, "up": 1 if ok else 0, **timing.fields(urlsplit(url).scheme == "https")}
+        if keepalive: fields["reused"] = timing.reused
+        if redirects: fields["redirects"] = redirects
+        metrics = [Metric("http.check", fields, tags)]
+        slug    = name.lower().replace(" ", "_")
+        if not ok: return metrics, [Alert(f"http_down_{slug}", f"'{name}' DOWN — {error}", severity, "http", tags)]
+        alerts = []
+        for phase, limit in (check.get("max_ms") or {}).items():
+            took = getattr(timing, phase, None) if phase in PHASES else None
+            if took is None: log.warning(f"HTTP check '{name}': unknown max_ms phase {phase!r}"); continue
+            self._track(f"{slug}:{phase}", took, float(limit or 0))
+            if limit and took > float(limit):
+                alerts.append(Alert(f"http_slow_{slug}_{phase}", f"'{name}' {phase} {took:.0f}ms > {limit}ms",
+                                    check.get("slow_severity", Severity.WARNING), "http", dict(tags, phase=phase)))
         return metrics, alerts
+
+    def _request(self, key: Optional[str], url: str, check: Dict, timeout: float, timing: _Timing) -> Tuple[int, Dict, str]:
+        parts = urlsplit(url); https = parts.scheme == "https"
+        host  = parts.hostname or ""; port = parts.port or (443 if https else 80)
+        if parts.scheme in self._proxies and not urllib.request.proxy_bypass(host):
+            return self._request_proxied(url, check, timeout, timing)
+        path  = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        conn  = self._reuse(key, (parts.scheme, host, port))
+        for attempt in (0, 1):
+            if conn is None: conn = self._connect(host, port, https, check, timeout, timing)
+            else: timing.reused = 1
+            t0 = time.perf_counter()
+            try:
+                conn.request(check.get("method", "GET").upper(), path, headers=check.get("headers", {}))
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if attempt or not timing.reused: raise
+                conn = None; timing.reused = 0; continue   # idle keep-alive connection was closed by the server
+            except Exception:
+                conn.close(); raise
+            timing.ttfb += (time.perf_counter() - t0) * 1000
+            break
+        body = resp.read() if key else resp.read(4096)
+        if key and not resp.will_close: self._conns[key] = ((parts.scheme, host, port), conn)
+        else: conn.close(); self._conns.pop(key, None)
+        return resp.status, resp.headers, body[:4096].decode("utf-8", errors="replace")
+
+    def _request_proxied(self, url: str, check: Dict, timeout: float, timing: _Timing) -> Tuple[int, Dict, str]:
+        """Go through the ``*_proxy`` environment proxy with urllib; only ttfb and the total are measurable."""
+        handlers = [_NoRedirect()]
+        if check.get("verify_tls", True) is False:
+            ctx = ssl.create_default_context(); ctx.check_hostname = False; ctx.verify_mode = ssl.CERT_NONE
+            handlers.append(urllib.request.HTTPSHandler(context=ctx))
+        req = urllib.request.Request(url, headers=check.get("headers", {}), method=check.get("method", "GET").upper())
+        timing.proxied = True; t0 = time.perf_counter()
+        try: resp = urllib.request.build_opener(*handlers).open(req, timeout=timeout)
+        except urllib.error.HTTPError as e: resp = e
+        timing.ttfb += (time.perf_counter() - t0) * 1000
+        with resp: return resp.getcode(), resp.headers, resp.read(4096).decode("utf-8", errors="replace")
+
+    def _connect(self, host: str, port: int, https: bool, check: Dict, timeout: float, timing: _Timing) -> http.client.HTTPConnection:
+        t0 = time.perf_counter()
+        addrs = self._resolver.resolve(host, port, timeout)
+        t1 = time.perf_counter(); timing.dns += (t1 - t0) * 1000
+        sock, err = None, None
+        for family, stype, proto, _, addr in addrs:
+            try:
+                sock = socket.socket(family, stype, proto); sock.settimeout(timeout); sock.connect(addr); break
+            except OSError as e:
+                if sock: sock.close()
+                sock, err = None, e
+        if sock is None: raise err or OSError(f"no addresses for {host}")
+        t2 = time.perf_counter(); timing.connect += (t2 - t1) * 1000
+        if not https:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout); conn.sock = sock
+            return conn
+        ctx = ssl.create_default_context()
+        if check.get("verify_tls", True) is False: ctx.check_hostname = False; ctx.verify_mode = ssl.CERT_NONE
+        try: sock = ctx.wrap_socket(sock, server_hostname=host)
+        except Exception: sock.close(); raise
+        timing.tls += (time.perf_counter() - t2) * 1000
+        conn = http.client.HTTPSConnection(host, port, timeout=timeout, context=ctx); conn.sock = sock
+        return conn
+
+    def _reuse(self, key: Optional[str], target: Tuple[str, str, int]) -> Optional[http.client.HTTPConnection]:
+        if key is None or key not in self._conns: return None
+        dest, conn = self._conns[key]
+        if dest == target: return conn
+        conn.close(); del self._conns[key]; return None
+
+    def _drop(self, key: str) -> None:
+        entry = self._conns.pop(key, None)
+        if entry: entry[1].close()
@@ -0,0 +1,27 @@
+from __future__ import annotations
+import logging
+from typing import List, Tuple
+from lurkkit.collectors.base import BaseCollector
+from lurkkit.models import Alert, Metric
+from lurkkit.selfmon import stats
+
+log = logging.getLogger(__name__)
+try:
+    import psutil; _HAS_PSUTIL = True
+except ImportError:
+    _HAS_PSUTIL = False
+
+class SelfCollector(BaseCollector):
+    """Drains the agent's own counters and timings into the metric stream as ``lurkkit.internal.*``."""
+    def __init__(self, cfg, hostname):
+        super().__init__(cfg, hostname)
+        self._proc = psutil.Process() if _HAS_PSUTIL else None
+
+    def collect(self) -> Tuple[List[Metric], List[Alert]]:
+        tags    = self._base_tags()
+        metrics = stats.drain(tags)
+        if self._proc is not None:
+            with self._proc.oneshot():
+                metrics.append(Metric("lurkkit.internal.process", {"rss_mb": self._proc.memory_info().rss / 1024 / 1024,
+                                      "cpu_percent": self._proc.cpu_percent(None), "threads": self._proc.num_threads()}, tags))
+        return metrics, []
@@ -1,43 +1,210 @@
 from __future__ import annotations
-import logging, os, re
-from collections import defaultdict
-from typing import Dict, List, Tuple
+import logging, os, random, re, sys, time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from lurkkit.collectors.base import BaseCollector
 from lurkkit.models import Alert, Metric, Severity
+from lurkkit.selfmon import stats
 
 log = logging.getLogger(__name__)
 
+class MatchSummary:
+    """All matches of one pattern in one file during a scan, folded into a single record."""
+    __slots__ = ("count", "first_ts", "last_ts", "samples")
+
+    def __init__(self):
+        self.count = 0; self.first_ts = 0.0; self.last_ts = 0.0; self.samples: List[str] = []
+
+    def add(self, line: str, k: int) -> None:
+        self.count += 1
+        if len(self.samples) < k: self.samples.append(line.strip()[:200])
+        else:
+            j = random.randrange(self.count)
+            if j < k: self.samples[j] = line.strip()[:200]
+
+    def merge(self, other: "MatchSummary", k: int) -> None:
+        """Fold in another shard's summary; samples are redrawn by match count so they stay a uniform sample."""
+        if not other.count: return
+        self.first_ts = min(self.first_ts, other.first_ts) if self.count else other.first_ts
+        self.last_ts  = max(self.last_ts, other.last_ts)
+        a, b, na, nb, out = list(self.samples), list(other.samples), self.count, other.count, []
+        while len(out) < k and (a or b):
+            if a and (not b or random.random() * (na + nb) < na): out.append(a.pop(random.randrange(len(a)))); na -= 1
+            else: out.append(b.pop(random.randrange(len(b)))); nb -= 1
+        self.count += other.count; self.samples = out
+
+@lru_cache(maxsize=256)
+def _compile(regex: str):
+    return re.compile(regex, re.IGNORECASE)
+
+_ISO_TS    = re.compile(r"\[?(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})([.,]\d+)?(Z|[+-]\d{2}:?\d{2})?")
+_SYSLOG_TS = re.compile(r"([A-Z][a-z]{2}) {1,2}(\d{1,2}) (\d{2}:\d{2}:\d{2})")
+
+def line_time(line: str, now: float) -> float:
+    """Epoch time a log line starts with (ISO 8601 or syslog; local time unless it has an offset), else ``now``."""
+    try:
+        m = _ISO_TS.match(line)
+        if m:
+            date, clock, frac, tz = m.groups()
+            dt = datetime.strptime(f"{date} {clock}", "%Y-%m-%d %H:%M:%S")
+            if tz:
+                off = 0 if tz == "Z" else (1 if tz[0] == "+" else -1) * (int(tz[1:3]) * 60 + int(tz[-2:]))
+                ts = dt.replace(tzinfo=timezone.utc).timestamp() - off * 60
+            else: ts = time.mktime(dt.timetuple())
+            return ts + float(frac.replace(",", ".")) if frac else ts
+        m = _SYSLOG_TS.match(line)
+        if m:
+            year = time.localtime(now).tm_year
+            ts = time.mktime(datetime.strptime(f"{year} {m[1]} {m[2]} {m[3]}", "%Y %b %d %H:%M:%S").timetuple())
+            return ts if ts <= now + 86400 else time.mktime(datetime.strptime(f"{year - 1} {m[1]} {m[2]} {m[3]}", "%Y %b %d %H:%M:%S").timetuple())
+    except (ValueError, OverflowError): pass
+    return now
+
+def scan_lines(lines: List[str], patterns: List[Dict], samples: int = 3) -> Dict[str, MatchSummary]:
+    compiled = [(p["regex"], _compile(p["regex"]).search) for p in patterns if p.get("regex")]
+    found: Dict[str, MatchSummary] = {}; ends: Dict[str, List[str]] = {}
+    for line in lines:
+        for regex, search in compiled:
+            if search(line):
+                rec = found.get(regex)
+                if rec is None: rec = found[regex] = MatchSummary(); ends[regex] = [line, line]
+                else: ends[regex][1] = line
+                rec.add(line, samples)
+    # Only the first and last match of each pattern are timestamped: from the line itself, else the scan time.
+    now = time.time()
+    for regex, rec in found.items():
+        rec.first_ts, rec.last_ts = (line_time(l, now) for l in ends[regex])
+    return found
+
+def scan_range(path: str, start: int, end: int, patterns: List[Dict], samples: int = 3, tail_lines: int = 0) -> Dict[str, MatchSummary]:
+    """Scan bytes ``[start, end)`` of ``path``. Module-level so pool workers can read by offset themselves."""
+    with open(path, "rb") as f:
+        f.seek(start); lines = f.read(max(0, end - start)).decode("utf-8", errors="replace").splitlines()
+    return scan_lines(lines[-tail_lines:] if tail_lines else lines, patterns, samples)
+
+def shard_ranges(path: str, start: int, end: int, size: int) -> List[Tuple[int, int]]:
+    """Split ``[start, end)`` into ranges of roughly ``size`` bytes that break on line boundaries."""
+    bounds = [start]
+    if size > 0:
+        with open(path, "rb") as f:
+            pos = start + size
+            while pos < end:
+                f.seek(pos); f.readline(); pos = f.tell()
+                if pos >= end: break
+                bounds.append(pos); pos += size
+    return list(zip(bounds, bounds[1:] + [end]))
+
 class LogCollector(BaseCollector):
     def __init__(self, cfg, hostname):
         super().__init__(cfg, hostname); self._positions: Dict[str, int] = {}
+        self.workers = int(cfg.get("workers", 0)); self.shard_size = int(float(cfg.get("shard_mb", 8)) * 1024 * 1024)
+        self._pool = None
+
+    def close(self) -> None:
+        if self._pool:
+            if sys.version_info >= (3, 9): self._pool.shutdown(wait=True, cancel_futures=True)
+            else: self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            import multiprocessing as mp
+            from concurrent.futures import ProcessPoolExecutor
+            method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context(method))
+        return self._pool
+
+    def inherit(self, previous: BaseCollector) -> None:
+        if isinstance(previous, LogCollector): self._positions.update(previous._positions)
 
     def collect(self) -> Tuple[List[Metric], List[Alert]]:
+        if self.workers > 0: return self._collect_pooled()
         metrics, alerts = [], []
         for fdef in self.cfg.get("files", []):
-            m, a = self._tail(fdef); metrics.extend(m); alerts.extend(a)
+            with stats.timer("check", collector="logs", check=os.path.basename(fdef.get("path", ""))):
+                m, a = self._tail(fdef)
+            metrics.extend(m); alerts.extend(a)
+        return metrics, alerts
+
+    def _collect_pooled(self) -> Tuple[List[Metric], List[Alert]]:
+        # Workers get (path, offsets) and return MatchSummary records, so no log text crosses the process boundary.
+        jobs = []
+        for fdef in self.cfg.get("files", []):
+            span = self._advance(fdef)
+            if span is None: continue
+            path, start, end, tail = span; patterns = fdef.get("patterns", []); k = int(fdef.get("samples", 3))
+            shards = [(start, end)] if tail else shard_ranges(path, start, end, self.shard_size)
+            for attempt in (0, 1):
+                pool = self._executor()
+                try: futures = [pool.submit(scan_range, path, s, e, patterns, k, tail) for s, e in shards]; break
+                except BrokenProcessPool:
+                    self._discard(pool)
+                    if attempt: self._rewind(span); raise
+            jobs.append((fdef, span, pool, time.perf_counter(), futures))
+        metrics, alerts = [], []
+        for fdef, span, pool, t0, futures in jobs:
+            found: Dict[str, MatchSummary] = {}
+            try:
+                for fut in futures:
+                    for regex, rec in fut.result().items():
+                        if regex in found: found[regex].merge(rec, int(fdef.get("samples", 3)))
+                        else: found[regex] = rec
+            except BrokenProcessPool as e:
+                log.warning(f"Log scan of {fdef.get('path')} failed, worker pool died: {e}")
+                self._discard(pool); self._rewind(span); continue
+            except Exception as e:
+                log.warning(f"Log scan of {fdef.get('path')} failed in worker: {e}"); self._rewind(span); continue
+            stats.timing("check", time.perf_counter() - t0, collector="logs", check=os.path.basename(fdef["path"]))
+            m, a = self._emit(fdef, found); metrics.extend(m); alerts.extend(a)
         return metrics, alerts
 
+    def _rewind(self, span: Tuple[str, int, int, int]) -> None:
+        """A failed scan leaves its bytes unread, so the next run scans them again."""
+        path, start, end, tail = span
+        if self._positions.get(path) == end: self._positions[path] = 0 if tail else start
+
+    def _discard(self, pool) -> None:
+        """Drop a broken pool without waiting on its dead workers; the next scan starts a fresh one."""
+        pool.shutdown(wait=False)
+        if self._pool is pool: self._pool = None
+
+    def _advance(self, fdef) -> Optional[Tuple[str, int, int, int]]:
+        """Return (path, start, end, tail_lines) of the unread bytes and move the stored position to EOF."""
+        path = fdef.get("path", "")
+        if not path or not os.path.exists(path): return None
+        try: eof = os.path.getsize(path)
+        except OSError as e: log.warning(f"Cannot read {path}: {e}"); return None
+        last = self._positions.get(path, 0); self._positions[path] = eof
+        if last == 0: return path, max(0, eof - 32768), eof, int(fdef.get("tail_lines", 200))
+        return path, 0 if eof < last else last, eof, 0
+
     def _tail(self, fdef):
-        path = fdef.get("path", ""); patterns = fdef.get("patterns", [])
-        if not path or not os.path.exists(path): return [], []
+        span = self._advance(fdef)
+        if span is None: return [], []
+        try: found = scan_range(*span[:3], fdef.get("patterns", []), int(fdef.get("samples", 3)), span[3])
+        except (PermissionError, OSError) as e: log.warning(f"Cannot read {span[0]}: {e}"); self._rewind(span); return [], []
+        return self._emit(fdef, found)
+
+    def _emit(self, fdef, found: Dict[str, MatchSummary]):
+        path = fdef["path"]; patterns = fdef.get("patterns", [])
         tags = self._base_tags(logfile=os.path.basename(path))
-        try:
-            with open(path, "rb") as f:
-                f.seek(0, 2); eof = f.tell(); last = self._positions.get(path, 0)
-                if last == 0: f.seek(max(0, eof - 32768)); lines = f.read().decode("utf-8", errors="replace").splitlines()[-fdef.get("tail_lines", 200):]
-                else:
-                    if eof < last: last = 0
-                    f.seek(last); lines = f.read().decode("utf-8", errors="replace").splitlines()
-                self._positions[path] = eof
-        except (PermissionError, OSError) as e: log.warning(f"Cannot read {path}: {e}"); return [], []
-        metrics, alerts, counts = [], [], defaultdict(int)
-        for line in lines:
-            for p in patterns:
-                regex = p.get("regex", ""); sev = p.get("severity", Severity.WARNING)
-                if regex and re.search(regex, line, re.IGNORECASE):
-                    counts[regex] += 1
-                    if p.get("alert", True):
-                        alerts.append(Alert(f"log_{os.path.basename(path)}_{regex[:20]}", f"Pattern '{regex}' in {path}: {line.strip()[:200]}", sev, "logs", dict(tags, pattern=regex[:50])))
-        for regex, count in counts.items():
-            metrics.append(Metric("log.matches", {"count": count}, dict(tags, pattern=regex[:50])))
+        metrics, alerts = [], []
+        for p in patterns:
+            regex = p.get("regex", ""); rec = found.pop(regex, None)
+            if rec is None: continue
+            ptags = dict(tags, pattern=regex[:50])
+            metrics.append(Metric("log.matches", {"count": rec.count, "first_ts": rec.first_ts, "last_ts": rec.last_ts}, ptags))
+            if p.get("alert", True):
+                alerts.append(self._alert(path, regex, rec, p.get("severity", Severity.WARNING), ptags))
         return metrics, alerts
+
+    @staticmethod
+    def _alert(path: str, regex: str, rec: MatchSummary, sev: str, tags: Dict[str, str]) -> Alert:
+        span = lambda ts: datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+        when = f", {span(rec.first_ts)}–{span(rec.last_ts)}" if rec.last_ts > rec.first_ts else ""
+        head = f"Pattern '{regex}' in {path}" + (f" ({rec.count} matches{when})" if rec.count > 1 else "")
+        msg  = f"{head}: {rec.samples[0]}" + "".join(f"\n  {s}" for s in rec.samples[1:])
+        return Alert(f"log_{os.path.basename(path)}_{regex[:20]}", msg, sev, "logs", dict(tags, count=str(rec.count)),
+                     timestamp=datetime.fromtimestamp(rec.first_ts, timezone.utc))
@@ -3,6 +3,7 @@ import logging
 from typing import Dict, List, Tuple
 from lurkkit.collectors.base import BaseCollector
 from lurkkit.models import Alert, Metric, Severity
+from lurkkit.selfmon import stats
 
 log = logging.getLogger(__name__)
 try:
@@ -19,7 +20,8 @@ class ProcessCollector(BaseCollector):
             try: running.setdefault(proc.info["name"], []).append(proc)
             except (psutil.NoSuchProcess, psutil.AccessDenied): pass
         for watch in self.cfg.get("watch", []):
-            self._check(watch, running, metrics, alerts)
+            with stats.timer("check", collector="processes", check=watch.get("name", "")):
+                self._check(watch, running, metrics, alerts)
         return metrics, alerts
 
     def _check(self, watch, running, metrics, alerts):
@@ -32,11 +34,17 @@ class ProcessCollector(BaseCollector):
         if len(matching) < min_count:
             alerts.append(Alert(f"process_missing_{wname}", f"Process '{wname}' has {len(matching)}/{min_count} instances",
                                 Severity.CRITICAL, "process", tags)); return
-        for proc in matching:
+        limit = int(watch.get("max_pid_series", self.cfg.get("max_pid_series", 20)))
+        other = {"cpu_percent": 0.0, "mem_mb": 0.0, "count": 0}
+        for i, proc in enumerate(sorted(matching, key=lambda p: p.pid)):
             try:
                 cpu = proc.cpu_percent(interval=0.1); mem = proc.memory_info().rss / 1024 / 1024
                 pt  = dict(tags, pid=str(proc.pid))
-                metrics.append(Metric("process.stats", {"cpu_percent": cpu, "mem_mb": mem}, pt))
+                self._track(f"cpu:{wname}:{proc.pid}", cpu, max_cpu); self._track(f"mem:{wname}:{proc.pid}", mem, max_mem)
+                if limit <= 0 or i < limit:
+                    metrics.append(Metric("process.stats", {"cpu_percent": cpu, "mem_mb": mem}, pt))
+                else:
+                    other["cpu_percent"] += cpu; other["mem_mb"] += mem; other["count"] += 1
                 if max_cpu > 0 and cpu > max_cpu:
                     alerts.append(Alert(f"process_cpu_{wname}_{proc.pid}", f"'{wname}' CPU {cpu:.1f}% > {max_cpu}%",
                                         Severity.CRITICAL if is_crit else Severity.WARNING, "process", pt))
@@ -44,3 +52,5 @@ class ProcessCollector(BaseCollector):
                     alerts.append(Alert(f"process_mem_{wname}_{proc.pid}", f"'{wname}' mem {mem:.0f}MB > {max_mem}MB",
                                         Severity.CRITICAL if is_crit else Severity.WARNING, "process", pt))
             except (psutil.NoSuchProcess, psutil.AccessDenied): pass
+        if other["count"]:
+            metrics.append(Metric("process.stats", other, dict(tags, pid="other")))
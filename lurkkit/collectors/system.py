@@ -19,13 +19,13 @@ class SystemCollector(BaseCollector):
         # CPU
         cpu = psutil.cpu_percent(interval=1)
         metrics.append(Metric("system.cpu", {"usage_percent": cpu, "core_count": psutil.cpu_count()}, tags))
-        w, c = thresh.get("cpu_percent", 85.0), crit.get("cpu_percent", 95.0)
+        w, c = thresh.get("cpu_percent", 85.0), crit.get("cpu_percent", 95.0); self._track("cpu", cpu, w)
         if cpu >= c:   alerts.append(Alert("high_cpu", f"CPU at {cpu:.1f}% (critical: {c}%)", Severity.CRITICAL, "system", tags))
         elif cpu >= w: alerts.append(Alert("high_cpu", f"CPU at {cpu:.1f}% (warning: {w}%)",  Severity.WARNING,  "system", tags))
         # Memory
         mem = psutil.virtual_memory()
         metrics.append(Metric("system.memory", {"usage_percent": mem.percent, "used_bytes": mem.used, "available_bytes": mem.available, "total_bytes": mem.total}, tags))
-        w, c = thresh.get("memory_percent", 90.0), crit.get("memory_percent", 97.0)
+        w, c = thresh.get("memory_percent", 90.0), crit.get("memory_percent", 97.0); self._track("memory", mem.percent, w)
         if mem.percent >= c:   alerts.append(Alert("high_memory", f"Memory at {mem.percent:.1f}% (critical: {c}%)", Severity.CRITICAL, "system", tags))
         elif mem.percent >= w: alerts.append(Alert("high_memory", f"Memory at {mem.percent:.1f}% (warning: {w}%)",  Severity.WARNING,  "system", tags))
         # Disk
@@ -34,7 +34,7 @@ class SystemCollector(BaseCollector):
                 u = psutil.disk_usage(part.mountpoint)
                 dt = dict(tags, mount=part.mountpoint, device=part.device)
                 metrics.append(Metric("system.disk", {"usage_percent": u.percent, "used_bytes": u.used, "free_bytes": u.free, "total_bytes": u.total}, dt))
-                w, c = thresh.get("disk_percent", 90.0), crit.get("disk_percent", 97.0)
+                w, c = thresh.get("disk_percent", 90.0), crit.get("disk_percent", 97.0); self._track(f"disk:{part.mountpoint}", u.percent, w)
                 n = f"high_disk_{part.mountpoint.replace('/', '_') or 'root'}"
                 if u.percent >= c:   alerts.append(Alert(n, f"Disk {part.mountpoint} at {u.percent:.1f}%", Severity.CRITICAL, "system", dt))
                 elif u.percent >= w: alerts.append(Alert(n, f"Disk {part.mountpoint} at {u.percent:.1f}%", Severity.WARNING,  "system", dt))
@@ -46,7 +46,7 @@ class SystemCollector(BaseCollector):
         if hasattr(psutil, "getloadavg"):
             l1, l5, l15 = psutil.getloadavg()
             metrics.append(Metric("system.load", {"load_1m": l1, "load_5m": l5, "load_15m": l15}, tags))
-            lt = float(thresh.get("load_1m", 0))
+            lt = float(thresh.get("load_1m", 0)); self._track("load", l1, lt)
             if lt > 0 and l1 >= lt:
                 alerts.append(Alert("high_load", f"Load {l1:.2f} (threshold: {lt})",
                                     Severity.CRITICAL if l1 >= lt * 1.5 else Severity.WARNING, "system", tags))
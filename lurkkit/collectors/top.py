@@ -0,0 +1,51 @@
+from __future__ import annotations
+import heapq, logging, time
+from operator import itemgetter
+from typing import Dict, List, Tuple
+from lurkkit.collectors.base import BaseCollector
+from lurkkit.models import Alert, Metric
+
+log = logging.getLogger(__name__)
+try:
+    import psutil; _HAS_PSUTIL = True
+except ImportError:
+    _HAS_PSUTIL = False
+
+class TopProcessCollector(BaseCollector):
+    """Top-K processes by CPU, RSS and IO from a single scan of the process table.
+
+    Series are tagged by ranking and rank only (the PID and process name are fields), so
+    cardinality stays at ``k`` per ranking.
+    """
+    _COLUMNS = {"cpu": 2, "rss": 3, "io": 4}
+
+    def __init__(self, cfg, hostname):
+        super().__init__(cfg, hostname)
+        self._prev: Dict[int, Tuple[float, int]] = {}; self._prev_ts = 0.0
+
+    def inherit(self, previous: BaseCollector) -> None:
+        if isinstance(previous, TopProcessCollector): self._prev, self._prev_ts = previous._prev, previous._prev_ts
+
+    def collect(self) -> Tuple[List[Metric], List[Alert]]:
+        if not _HAS_PSUTIL: return [], []
+        k  = int(self.cfg.get("k", 10)); by = [b for b in self.cfg.get("by", ["cpu", "rss", "io"]) if b in self._COLUMNS]
+        now = time.monotonic(); dt = now - self._prev_ts if self._prev_ts else 0.0
+        attrs = ["pid", "name", "cpu_times", "memory_info"] + (["io_counters"] if "io" in by else [])
+        prev, cur, rows = self._prev, {}, []
+        for proc in psutil.process_iter(attrs):
+            info = proc.info; ct = info.get("cpu_times"); mi = info.get("memory_info")
+            if ct is None or mi is None: continue
+            io = info.get("io_counters"); pid = info["pid"]
+            cpu_t = ct.user + ct.system; io_b = (io.read_bytes + io.write_bytes) if io else 0
+            cur[pid] = (cpu_t, io_b); p = prev.get(pid)
+            cpu = (cpu_t - p[0]) / dt * 100 if p and dt else 0.0
+            iob = max(0, io_b - p[1]) / dt if p and dt else 0.0
+            rows.append((pid, info.get("name") or "?", cpu, mi.rss / 1024 / 1024, iob))
+        self._prev, self._prev_ts = cur, now
+        metrics = [Metric("process.total", {"count": len(rows)}, self._base_tags())]
+        if not dt: return metrics, []
+        for key in by:
+            for rank, r in enumerate(heapq.nlargest(k, rows, key=itemgetter(self._COLUMNS[key])), 1):
+                metrics.append(Metric("process.top", {"pid": r[0], "process": r[1], "cpu_percent": r[2], "rss_mb": r[3],
+                                                      "io_bytes_per_s": r[4]}, self._base_tags(by=key, rank=str(rank))))
+        return metrics, []
@@ -6,24 +6,40 @@ from typing import Any, Dict, List, Optional
 log = logging.getLogger(__name__)
 
 DEFAULTS: Dict[str, Any] = {
-    "agent":     {"host_tag": "", "interval": 30, "log_level": "INFO", "log_file": ""},
+    "agent":     {"host_tag": "", "interval": 30, "log_level": "INFO", "log_file": "",
+                  "self_metrics": False, "self_metrics_interval": 60,
+                  "profile_mode": "cprofile", "profile_duration": 30, "profile_dir": "/tmp",
+                  "record": "", "record_max_mb": 256},
     "telemetry": {"enabled": False, "type": "stdout", "url": "http://localhost:8086/write?db=lurkkit",
-                  "statsd_host": "localhost", "statsd_port": 8125, "batch_size": 20, "flush_interval": 10},
+                  "statsd_host": "localhost", "statsd_port": 8125, "relay_host": "localhost", "relay_port": 8094,
+                  "batch_size": 20, "flush_interval": 10},
     "monitors":  {
         "system":    {"enabled": True,  "interval": 30,
                       "thresholds": {"cpu_percent": 85.0, "memory_percent": 90.0, "disk_percent": 90.0, "load_1m": 0.0, "swap_percent": 80.0},
-                      "critical_overrides": {"cpu_percent": 95.0, "memory_percent": 97.0, "disk_percent": 97.0}},
-        "processes": {"enabled": False, "interval": 30, "watch": []},
-        "http":      {"enabled": False, "interval": 60, "checks": []},
-        "logs":      {"enabled": False, "interval": 15, "files": []},
+                      "critical_overrides": {"cpu_percent": 95.0, "memory_percent": 97.0, "disk_percent": 97.0},
+                      "adaptive": {"enabled": False, "min_interval": 5, "margin": 0.1, "backoff": 1.5}},
+        "processes": {"enabled": False, "interval": 30, "max_pid_series": 20, "watch": []},
+        "top":       {"enabled": False, "interval": 30, "k": 10, "by": ["cpu", "rss", "io"]},
+        "cgroups":   {"enabled": False, "interval": 30, "root": "/sys/fs/cgroup", "max_depth": 3, "rescan_interval": 300,
+                      "include": ["*"], "exclude": [], "thresholds": {"memory_percent": 90.0, "oom_kills": 1},
+                      "critical_overrides": {"memory_percent": 97.0}, "overrides": []},
+        "http":      {"enabled": False, "interval": 60, "dns_cache_ttl": 0, "checks": []},
+        "logs":      {"enabled": False, "interval": 15, "workers": 0, "shard_mb": 8, "files": []},
     },
     "alerting": {
         "cooldown": 300, "send_resolve": True,
+        "state_file": "", "state_ttl": 86400, "state_max_entries": 10000, "snapshot_interval": 60,
+        "coalesce_window": 0, "digest_max_lines": 10, "rate_limit": {"rate": 0, "burst": 10},
         "paging_severities": ["critical"],
         "non_paging_severities": ["warning", "info"],
         "slack": {"enabled": False}, "pagerduty": {"enabled": False},
         "datadog": {"enabled": False}, "opsgenie": {"enabled": False},
     },
+    "rules": [],
+    "relay":    {"listen_host": "0.0.0.0", "tcp_port": 8094, "udp_port": 8089, "statsd_port": 8125,
+                 "upstream_url": "http://localhost:8086/write?db=lurkkit", "upstream_token": "",
+                 "workers": 0, "queue_size": 10000, "batch_size": 5000, "flush_interval": 5, "gzip": True,
+                 "aggregate": False, "spool_dir": "/var/lib/lurkkit/spool", "spool_max_mb": 512},
 }
 
 def default_config_paths() -> List[Path]:
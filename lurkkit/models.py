@@ -58,7 +58,7 @@ class Metric:
         return f"{meas} {fields} {self.timestamp_ns}"
 
     def to_statsd(self) -> List[str]:
-        return [f"{self.measurement}.{k}:{v}|g" for k, v in self.fields.items()]
+        return [f"{self.measurement}.{k}:{v}|g" for k, v in self.fields.items() if isinstance(v, (int, float))]
 
     @staticmethod
     def _fmt(k: str, v: Any) -> str:
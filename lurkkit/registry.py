@@ -0,0 +1,57 @@
+from __future__ import annotations
+import importlib, logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+COLLECTOR_GROUP = "lurkkit.collectors"
+ALERTER_GROUP   = "lurkkit.alerters"
+
+# Built-ins are kept as import paths so only the plugins enabled in config are ever imported.
+COLLECTORS: Dict[str, str] = {
+    "system":    "lurkkit.collectors.system:SystemCollector",
+    "processes": "lurkkit.collectors.process:ProcessCollector",
+    "http":      "lurkkit.collectors.http:HttpCollector",
+    "logs":      "lurkkit.collectors.logs:LogCollector",
+    "top":       "lurkkit.collectors.top:TopProcessCollector",
+    "cgroups":   "lurkkit.collectors.cgroup:CgroupCollector",
+}
+ALERTERS: Dict[str, str] = {
+    "pagerduty": "lurkkit.alerters.pagerduty:PagerDutyAlerter",
+    "opsgenie":  "lurkkit.alerters.opsgenie:OpsGenieAlerter",
+    "slack":     "lurkkit.alerters.slack:SlackAlerter",
+    "datadog":   "lurkkit.alerters.datadog:DatadogAlerter",
+}
+
+@lru_cache(maxsize=None)
+def entry_points(group: str) -> Dict[str, Any]:
+    """Third-party plugins registered under ``group`` in their package metadata."""
+    try:
+        from importlib import metadata
+        eps = metadata.entry_points()
+        found = eps.select(group=group) if hasattr(eps, "select") else eps.get(group, [])
+    except Exception as e:
+        log.warning(f"Plugin discovery for {group} failed: {e}"); return {}
+    return {ep.name: ep for ep in found}
+
+def _import(spec: str) -> type:
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+def _resolve(name: str, builtins: Dict[str, str], group: str) -> Optional[type]:
+    if name in builtins: return _import(builtins[name])
+    ep = entry_points(group).get(name)
+    return ep.load() if ep is not None else None
+
+def load_collector(name: str) -> Optional[type]:
+    return _resolve(name, COLLECTORS, COLLECTOR_GROUP)
+
+def load_alerter(name: str) -> Optional[type]:
+    return _resolve(name, ALERTERS, ALERTER_GROUP)
+
+def known_collectors() -> List[str]:
+    return sorted(set(COLLECTORS) | set(entry_points(COLLECTOR_GROUP)))
+
+def known_alerters() -> List[str]:
+    return sorted(set(ALERTERS) | set(entry_points(ALERTER_GROUP)))
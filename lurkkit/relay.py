@@ -0,0 +1,317 @@
+from __future__ import annotations
+import gzip, logging, multiprocessing as mp, os, queue, signal, socket, socketserver, threading, time, zlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+LP, STATSD = "lp", "statsd"
+_CHUNK     = 65536
+
+# Parsing
+def split_line(line: str) -> Optional[Tuple[str, str, int]]:
+    """Split a line-protocol point into (series key, fields, timestamp); None if malformed."""
+    i = 0
+    while True:
+        i = line.find(" ", i)
+        if i <= 0: return None
+        if line[i - 1] != "\\": break
+        i += 1
+    key, rest = line[:i], line[i + 1:].strip()
+    if not rest: return None
+    head, _, tail = rest.rpartition(" ")
+    if head and tail.isdigit(): fields, ts = head, int(tail)
+    else:                       fields, ts = rest, 0
+    if "=" not in fields: return None
+    return key, fields, ts
+
+def split_fields(fields: str) -> List[Tuple[str, str]]:
+    if '"' not in fields: return [tuple(f.split("=", 1)) for f in fields.split(",") if "=" in f]
+    out, cur, quoted = [], [], False
+    for ch in fields:
+        if ch == '"': quoted = not quoted
+        if ch == "," and not quoted:
+            out.append("".join(cur)); cur = []
+        else: cur.append(ch)
+    out.append("".join(cur))
+    return [tuple(f.split("=", 1)) for f in out if "=" in f]
+
+def parse_statsd(line: str) -> Optional[Tuple[str, float, str, float, str]]:
+    """Parse ``name:value|type[|@rate][|#k:v,...]`` into (name, value, type, rate, tag suffix)."""
+    name, sep, rest = line.partition(":")
+    if not sep or not name: return None
+    parts = rest.split("|")
+    if len(parts) < 2: return None
+    try: value = float(parts[0])
+    except ValueError: return None
+    rate, tags = 1.0, ""
+    for p in parts[2:]:
+        if p.startswith("@"):
+            try: rate = float(p[1:]) or 1.0
+            except ValueError: return None
+        elif p.startswith("#"):
+            tags = "".join(f",{k}={v}" for k, _, v in (t.partition(":") for t in sorted(p[1:].split(","))) if k and v)
+    return name.replace(" ", "_").replace(",", "_"), value, parts[1], rate, tags
+
+def series_key(kind: str, line: bytes) -> bytes:
+    """Cheap routing key: every point of one series maps to the same key (LP: up to the first space; StatsD: name and tags)."""
+    if kind == STATSD:
+        name, _, rest = line.strip().partition(b":")
+        tags = rest.partition(b"|#")[2].split(b"|", 1)[0]
+        return name + b"|" + b",".join(sorted(tags.split(b","))) if tags else name
+    return line.lstrip().split(b" ", 1)[0]
+
+# Worker
+class RelayWorker:
+    """Parses raw chunks, optionally pre-aggregates, and writes large compressed batches upstream.
+
+    Failed writes are spooled to disk (bounded by ``spool_max_mb``) and replayed oldest-first
+    once the upstream accepts writes again.
+    """
+    def __init__(self, cfg: Dict, index: int = 0, post: Optional[Callable[[bytes], None]] = None):
+        self.index = index
+        self.url = cfg.get("upstream_url", "http://localhost:8086/write?db=lurkkit"); self.token = cfg.get("upstream_token", "")
+        self.batch_size = int(cfg.get("batch_size", 5000)); self.flush_interval = float(cfg.get("flush_interval", 5))
+        self.use_gzip = bool(cfg.get("gzip", True)); self.aggregate = bool(cfg.get("aggregate", False))
+        self.spool_dir = Path(cfg["spool_dir"]) if cfg.get("spool_dir") else None
+        self.spool_max = int(float(cfg.get("spool_max_mb", 512)) * 1024 * 1024 / max(1, int(cfg.get("_workers", 1))))
+        self.post = post or self._http_post
+        self._lines: List[str] = []
+        self._agg:   Dict[str, Tuple[Dict[str, str], int]] = {}
+        self._statsd: Dict[Tuple[str, str, str], list] = {}
+        self._last_flush = time.monotonic()
+        self.points_in = self.points_out = self.dropped = self.lost = 0
+
+    def feed(self, kind: str, data: bytes) -> None:
+        text = data.decode("utf-8", errors="replace")
+        if kind == STATSD:
+            for line in text.splitlines():
+                if line: self._add_statsd(line.strip())
+        else:
+            for line in text.splitlines():
+                line = line.strip()
+                if not line or line[0] == "#": continue
+                self._add_lp(line)
+        if len(self._lines) + len(self._agg) >= self.batch_size: self.flush()
+
+    def maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval: self.flush()
+
+    def _add_lp(self, line: str) -> None:
+        parsed = split_line(line)
+        if parsed is None: self.dropped += 1; return
+        self.points_in += 1
+        if not self.aggregate:
+            self._lines.append(line if parsed[2] else f"{line} {time.time_ns()}"); return
+        key, fields, ts = parsed
+        prev = self._agg.get(key)
+        merged = dict(prev[0]) if prev else {}
+        merged.update(split_fields(fields))
+        self._agg[key] = (merged, max(ts or time.time_ns(), prev[1] if prev else 0))
+
+    def _add_statsd(self, line: str) -> None:
+        parsed = parse_statsd(line)
+        if parsed is None: self.dropped += 1; return
+        self.points_in += 1
+        name, value, kind, rate, tags = parsed
+        acc = self._statsd.get((name, tags, kind))
+        if kind == "c":
+            if acc is None: self._statsd[(name, tags, kind)] = [value / rate]
+            else: acc[0] += value / rate
+        elif kind == "g":
+            self._statsd[(name, tags, kind)] = [value]
+        elif kind in ("ms", "h", "d"):
+            if acc is None: self._statsd[(name, tags, kind)] = [1, value, value, value]
+            else: acc[0] += 1; acc[1] += value; acc[2] = min(acc[2], value); acc[3] = max(acc[3], value)
+        elif kind == "s":
+            if acc is None: self._statsd[(name, tags, kind)] = [{value}]
+            else: acc[0].add(value)
+        else: self.dropped += 1; self.points_in -= 1
+
+    def drain(self) -> List[str]:
+        now = time.time_ns()
+        lines, self._lines = self._lines, []
+        for key, (fields, ts) in self._agg.items():
+            lines.append(f"{key} {','.join(f'{k}={v}' for k, v in fields.items())} {ts}")
+        self._agg = {}
+        for (name, tags, kind), acc in self._statsd.items():
+            if kind in ("c", "g"): fields = f"value={acc[0]}"
+            elif kind == "s":      fields = f"count={len(acc[0])}i"
+            else:                  fields = f"count={acc[0]}i,mean={acc[1] / acc[0]},min={acc[2]},max={acc[3]}"
+            lines.append(f"{name}{tags} {fields} {now}")
+        self._statsd = {}
+        return lines
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        lines = self.drain()
+        if not lines: self._replay(); return
+        payload = "\n".join(lines).encode()
+        if self.use_gzip: payload = gzip.compress(payload, compresslevel=5)
+        try:
+            self.post(payload); self.points_out += len(lines)
+        except Exception as e:
+            log.warning(f"Relay worker {self.index}: upstream write failed ({len(lines)} points): {e}")
+            self._spool(payload, len(lines)); return
+        self._replay()
+
+    def _http_post(self, payload: bytes) -> None:
+        import urllib.request
+        hdrs = {"Content-Type": "text/plain; charset=utf-8"}
+        if self.use_gzip: hdrs["Content-Encoding"] = "gzip"
+        if self.token: hdrs["Authorization"] = f"Token {self.token}"
+        with urllib.request.urlopen(urllib.request.Request(self.url, data=payload, headers=hdrs, method="POST"), timeout=10): pass
+
+    def _spool(self, payload: bytes, points: int) -> None:
+        if self.spool_dir is None: self.lost += points; return
+        path = self.spool_dir / f"w{self.index}-{time.time_ns()}.lp{'.gz' if self.use_gzip else ''}"
+        tmp  = path.with_name(path.name + ".tmp")
+        try:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(payload); os.replace(tmp, path)
+            files = self._spooled(); total = sum(f.stat().st_size for f in files)
+            while files and total > self.spool_max:
+                oldest = files.pop(0); total -= oldest.stat().st_size; oldest.unlink()
+                log.warning(f"Relay worker {self.index}: spool full, dropped {oldest.name}")
+        except OSError as e:
+            self.lost += points
+            log.error(f"Relay worker {self.index}: cannot spool to {self.spool_dir}, dropped {points} points ({self.lost} so far): {e}")
+            try: tmp.unlink()
+            except OSError: pass
+
+    def _spooled(self) -> List[Path]:
+        if self.spool_dir is None or not self.spool_dir.exists(): return []
+        return sorted(p for p in self.spool_dir.glob(f"w{self.index}-*") if not p.name.endswith(".tmp"))
+
+    def _replay(self, limit: int = 10) -> None:
+        try: pending = self._spooled()[:limit]
+        except OSError: return
+        for path in pending:
+            try: self.post(path.read_bytes()); path.unlink()
+            except Exception: return
+
+def _worker_main(index: int, cfg: Dict, q) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker = RelayWorker(cfg, index)
+    while True:
+        try: item = q.get(timeout=min(1.0, worker.flush_interval))
+        except queue.Empty: item = ()
+        if item is None: break
+        if item: worker.feed(*item)
+        worker.maybe_flush()
+    worker.flush()
+    log.info(f"Relay worker {index}: {worker.points_in} points in, {worker.points_out} out, {worker.dropped} malformed, {worker.lost} lost")
+
+# Listeners
+class _TCPHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        relay: Relay = self.server.relay
+        pending = b""
+        while True:
+            data = self.request.recv(_CHUNK)
+            if not data: break
+            pending += data
+            cut = pending.rfind(b"\n")
+            if cut < 0:
+                if len(pending) > 16 * _CHUNK: pending = b""
+                continue
+            relay.submit(LP, pending[:cut + 1], block=True); pending = pending[cut + 1:]
+        if pending.strip(): relay.submit(LP, pending, block=True)
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True; allow_reuse_address = True
+
+class Relay:
+    """Fleet relay: accepts line protocol (TCP/UDP) and StatsD from many agents and batches upstream.
+
+    Listener threads only read sockets and hand raw chunks to a pool of worker processes, which
+    parse, pre-aggregate and forward in parallel. Each worker has its own queue; when aggregating,
+    chunks are split by series so a series is only ever aggregated (and flushed) by one worker.
+    """
+    def __init__(self, cfg: Dict):
+        self.cfg = dict(cfg)
+        self.workers = int(cfg.get("workers", 0)) or os.cpu_count() or 1
+        self.cfg["_workers"] = self.workers
+        self.host = cfg.get("listen_host", "0.0.0.0")
+        self.aggregate = bool(cfg.get("aggregate", False))
+        size = max(1, int(cfg.get("queue_size", 10000)) // self.workers)
+        self._queues = [mp.Queue(maxsize=size) for _ in range(self.workers)]
+        self._procs: List[mp.Process] = []
+        self._servers: list = []; self._socks: List[socket.socket] = []
+        self._running = False; self._next = 0; self.udp_dropped = self.tcp_dropped = 0
+
+    def submit(self, kind: str, data: bytes, block: bool = False) -> None:
+        for i, chunk in self.route(kind, data):
+            try: self._queues[i].put((kind, chunk), block=block, timeout=5 if block else None)
+            except queue.Full:
+                if not block: self.udp_dropped += 1; continue
+                self.tcp_dropped += 1
+                log.warning(f"Relay: worker {i} queue full for 5s, dropped a {len(chunk):,}-byte TCP chunk")
+
+    def route(self, kind: str, data: bytes) -> List[Tuple[int, bytes]]:
+        """Assign a chunk to worker queues: split by series hash when it will be aggregated, else round-robin."""
+        n = len(self._queues)
+        if n == 1: return [(0, data)]
+        if kind == LP and not self.aggregate:
+            self._next = (self._next + 1) % n; return [(self._next, data)]
+        parts: Dict[int, List[bytes]] = {}
+        for line in data.split(b"\n"):
+            if line.strip(): parts.setdefault(zlib.crc32(series_key(kind, line)) % n, []).append(line)
+        return [(i, b"\n".join(lines)) for i, lines in parts.items()]
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            p = mp.Process(target=_worker_main, args=(i, self.cfg, self._queues[i]), name=f"lurkkit-relay-{i}", daemon=True)
+            p.start(); self._procs.append(p)
+        self._running = True
+        tcp_port = int(self.cfg.get("tcp_port", 8094))
+        if tcp_port:
+            srv = _TCPServer((self.host, tcp_port), _TCPHandler); srv.relay = self
+            threading.Thread(target=srv.serve_forever, name="lurkkit-relay-tcp", daemon=True).start()
+            self._servers.append(srv); log.info(f"Relay: line protocol on tcp://{self.host}:{srv.server_address[1]}")
+        for kind, key, default in ((LP, "udp_port", 8089), (STATSD, "statsd_port", 8125)):
+            port = int(self.cfg.get(key, default))
+            if not port: continue
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024); sock.bind((self.host, port))
+            self._socks.append(sock)
+            threading.Thread(target=self._udp_loop, args=(sock, kind), name=f"lurkkit-relay-{key}", daemon=True).start()
+            log.info(f"Relay: {'StatsD' if kind == STATSD else 'line protocol'} on udp://{self.host}:{sock.getsockname()[1]}")
+        log.info(f"Relay: {self.workers} workers → {self.cfg.get('upstream_url')}")
+
+    def _udp_loop(self, sock: socket.socket, kind: str) -> None:
+        buf, size, last = [], 0, time.monotonic()
+        sock.settimeout(0.2)
+        while self._running:
+            try:
+                data = sock.recv(_CHUNK)
+                buf.append(data); size += len(data)
+            except socket.timeout: pass
+            except OSError: break
+            if buf and (size >= _CHUNK or time.monotonic() - last >= 0.2):
+                self.submit(kind, b"\n".join(buf)); buf, size, last = [], 0, time.monotonic()
+        if buf: self.submit(kind, b"\n".join(buf))
+
+    def stop(self) -> None:
+        self._running = False
+        for srv in self._servers: srv.shutdown(); srv.server_close()
+        for sock in self._socks: sock.close()
+        for q in self._queues: q.put(None)
+        for p in self._procs: p.join(timeout=15)
+        if self.udp_dropped: log.warning(f"Relay: {self.udp_dropped} UDP chunks dropped (queue full)")
+        if self.tcp_dropped: log.warning(f"Relay: {self.tcp_dropped} TCP chunks dropped (queue full for 5s)")
+        log.info("Relay stopped.")
+
+    def run(self) -> None:
+        self.start()
+        done = threading.Event()
+        signal.signal(signal.SIGINT,  lambda *_: done.set())
+        signal.signal(signal.SIGTERM, lambda *_: done.set())
+        while not done.wait(1):
+            for i, p in enumerate(self._procs):
+                if not p.is_alive():
+                    log.error(f"Relay worker {i} exited ({p.exitcode}), restarting")
+                    self._procs[i] = mp.Process(target=_worker_main, args=(i, self.cfg, self._queues[i]),
+                                                name=f"lurkkit-relay-{i}", daemon=True)
+                    self._procs[i].start()
+        self.stop()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+import json, logging, os, struct, threading, time, zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from lurkkit.alerters.base import BaseAlerter
+from lurkkit.models import Alert, Metric
+
+log = logging.getLogger(__name__)
+
+MAGIC   = b"LKREC1\n"
+_LENGTH = struct.Struct(">I")
+
+Record = Tuple[float, str, List[Metric], List[Alert]]
+
+# Recording
+def encode(ts: float, collector: str, metrics: List[Metric], alerts: List[Alert]) -> bytes:
+    body = {"t": ts, "c": collector,
+            "m": [[m.measurement, m.fields, m.tags, m.timestamp_ns] for m in metrics],
+            "a": [[a.name, a.message, a.severity, a.source, a.tags, a.resolved, a.timestamp.timestamp()] for a in alerts]}
+    data = zlib.compress(json.dumps(body, separators=(",", ":"), default=str).encode(), 6)
+    return _LENGTH.pack(len(data)) + data
+
+def decode(data: bytes) -> Record:
+    body = json.loads(zlib.decompress(data))
+    return (body["t"], body["c"], [Metric(*m) for m in body["m"]],
+            [Alert(n, msg, sev, src, tags, res, datetime.fromtimestamp(ts, timezone.utc)) for n, msg, sev, src, tags, res, ts in body["a"]])
+
+def read_records(path: str) -> Iterator[Record]:
+    """Yield records in order; a truncated trailing record (agent killed mid-write) ends the stream."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC: raise ValueError(f"{path} is not a LurkKit recording")
+        while True:
+            head = f.read(_LENGTH.size)
+            if len(head) < _LENGTH.size: return
+            data = f.read(_LENGTH.unpack(head)[0])
+            try: yield decode(data)
+            except (zlib.error, ValueError, KeyError, TypeError):
+                log.warning(f"{path}: truncated or corrupt record at the end of the recording"); return
+
+class Recorder:
+    """Appends each collector run's ``(metrics, alerts)`` as a length-prefixed, zlib-compressed JSON record.
+
+    When the file reaches ``max_mb`` it is rotated to ``<path>.1`` and a new recording started.
+    """
+    def __init__(self, path: str, max_mb: float = 256):
+        self.path = path; self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self._lock = threading.Lock(); self._f = None; self._size = 0
+
+    def record(self, collector: str, metrics: List[Metric], alerts: List[Alert]) -> None:
+        rec = encode(time.time(), collector, metrics, alerts)
+        with self._lock:
+            try:
+                if self._f is None: self._open()
+                elif self.max_bytes and self._size + len(rec) > self.max_bytes: self._rotate()
+                self._f.write(rec); self._f.flush(); self._size += len(rec)
+            except OSError as e:
+                log.error(f"Recorder: cannot write {self.path}: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f: self._f.close(); self._f = None
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._f = open(self.path, "ab"); self._size = self._f.tell()
+        if self._size == 0: self._f.write(MAGIC); self._size = len(MAGIC)
+        log.info(f"Recording collector output to {self.path}")
+
+    def _rotate(self) -> None:
+        self._f.close(); os.replace(self.path, f"{self.path}.1"); self._open()
+
+# Stand-ins
+class MemorySink:
+    """Sink that renders line protocol and counts, optionally sleeping ``latency_ms`` per batch."""
+    def __init__(self, latency_ms: float = 0):
+        self.count = 0; self.batches = 0; self.latency = latency_ms / 1000
+    def send(self, metrics: List[Metric]) -> None:
+        for m in metrics: m.to_line_protocol()
+        if self.latency: time.sleep(self.latency)
+        self.count += len(metrics); self.batches += 1
+
+class MemoryAlerter(BaseAlerter):
+    def __init__(self, name: str = "memory", paging: bool = False, latency_ms: float = 0):
+        self.name = name; self.paging = paging; self.latency = latency_ms / 1000; self.sent: List[Alert] = []
+    def send(self, alert: Alert) -> None:
+        if self.latency: time.sleep(self.latency)
+        self.sent.append(alert)
+
+# Replay
+class Replayer:
+    """Feeds a recording through rules, ``MetricBuffer`` and ``AlertManager`` as configured, against stand-ins.
+
+    ``speed`` scales the recorded gaps between runs (1 = real time, 10 = 10x); ``None`` replays as fast as possible.
+    Rules and the alert manager run on the recorded timestamps, so ``for:``, hysteresis and cooldowns
+    behave as they did on the host whatever the speed.
+    """
+    def __init__(self, cfg: Dict, speed: Optional[float] = 1.0, sink_latency_ms: float = 0, alerter_latency_ms: float = 0):
+        from lurkkit.agent import LurkKitAgent
+        from lurkkit.alert_manager import AlertManager
+        from lurkkit.rules import RuleEngine
+        from lurkkit.telemetry import MetricBuffer
+        self.speed = speed
+        tel_cfg = cfg.get("telemetry", {}); alert_cfg = cfg.get("alerting", {})
+        self.sink   = MemorySink(sink_latency_ms)
+        self.buffer = MetricBuffer(self.sink, tel_cfg.get("batch_size", 20), tel_cfg.get("flush_interval", 10))
+        self.alerters = self._stand_ins(alert_cfg, alerter_latency_ms)
+        limits = {}
+        for key, a in self.alerters.items():
+            rl = {**alert_cfg.get("rate_limit", {}), **(alert_cfg.get(key) or {}).get("rate_limit", {})}
+            limits[a] = (float(rl.get("rate", 0)), float(rl.get("burst", 10)))
+        options = dict(LurkKitAgent._alert_mgr_options(alert_cfg), state_file="")
+        self.alert_mgr = AlertManager([a for a in self.alerters.values() if a.paging],
+                                      [a for a in self.alerters.values() if not a.paging], rate_limits=limits, **options)
+        self.rules = RuleEngine.from_config(cfg.get("rules", []))
+
+    @staticmethod
+    def _stand_ins(alert_cfg: Dict, latency_ms: float) -> Dict[str, MemoryAlerter]:
+        from lurkkit import registry
+        out = {}
+        for key, acfg in alert_cfg.items():
+            if not isinstance(acfg, dict) or not acfg.get("enabled", False): continue
+            try: cls_paging = getattr(registry.load_alerter(key), "paging", False)
+            except Exception: cls_paging = False
+            out[key] = MemoryAlerter(key, bool(acfg.get("paging", cls_paging)), latency_ms)
+        return out or {"paging": MemoryAlerter("paging", True, latency_ms), "non_paging": MemoryAlerter("non_paging", False, latency_ms)}
+
+    def run(self, path: str) -> Dict:
+        import resource
+        latencies: List[float] = []; n_metrics = n_alerts = 0; max_lag = 0.0
+        first: Optional[float] = None; start = time.perf_counter()
+        for ts, collector, metrics, alerts in read_records(path):
+            if first is None: first = ts
+            if self.speed:
+                due = start + (ts - first) / self.speed; now = time.perf_counter()
+                if due > now: time.sleep(due - now)
+                else: max_lag = max(max_lag, now - due)
+            t0 = time.perf_counter()
+            checked: set = set()
+            if self.rules: alerts = alerts + self.rules.evaluate(metrics, checked, now=ts)
+            self.buffer.add(metrics)
+            self.alert_mgr.process(alerts, checked, now=ts)
+            latencies.append(time.perf_counter() - t0)
+            n_metrics += len(metrics); n_alerts += len(alerts)
+        self.buffer.flush(); self.alert_mgr.flush()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+        return {"records": len(latencies), "metrics": n_metrics, "alerts": n_alerts, "elapsed_s": elapsed,
+                "recorded_span_s": (ts - first) if latencies else 0.0,
+                "metrics_per_s": n_metrics / elapsed if elapsed else 0.0, "alerts_per_s": n_alerts / elapsed if elapsed else 0.0,
+                "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+                "max_lag_ms": max_lag * 1000,
+                "sink_metrics": self.sink.count, "sink_batches": self.sink.batches, "buffered": len(self.buffer._buf),
+                "delivered": {k: len(a.sent) for k, a in self.alerters.items()},
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+def format_report(r: Dict) -> str:
+    lines = [f"  records     {r['records']:,} ({r['recorded_span_s']:.0f}s recorded, replayed in {r['elapsed_s']:.2f}s)",
+             f"  metrics     {r['metrics']:,}  ({r['metrics_per_s']:,.0f}/s)  → sink {r['sink_metrics']:,} in {r['sink_batches']:,} batches",
+             f"  alerts      {r['alerts']:,}  ({r['alerts_per_s']:,.0f}/s)  → " + ", ".join(f"{k} {v:,}" for k, v in r["delivered"].items()),
+             f"  latency     p50 {r['p50_ms']:.2f}ms  p95 {r['p95_ms']:.2f}ms  p99 {r['p99_ms']:.2f}ms  max {r['max_ms']:.2f}ms per collector run",
+             f"  max lag     {r['max_lag_ms']:.1f}ms behind schedule",
+             f"  peak RSS    {r['peak_rss_mb']:.1f} MB"]
+    return "\n".join(lines)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import fnmatch, logging, operator, time
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from lurkkit.models import Alert, Metric, Severity
+
+log = logging.getLogger(__name__)
+
+_OPS     = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+_GLOB    = set("*?[")
+_ORDERED = (">", ">=", "<", "<=")
+_STALE   = 3600.0
+
+class Rule:
+    """A declarative threshold: ``measurement.field <op> warning|critical`` over series matching ``tags``."""
+    __slots__ = ("name", "measurement", "field", "op", "op_str", "warning", "critical", "for_s", "hysteresis",
+                 "message", "exact", "globs")
+
+    def __init__(self, cfg: Dict[str, Any]):
+        self.name = cfg.get("name", ""); self.measurement = cfg.get("measurement", ""); self.field = cfg.get("field", "")
+        if not (self.name and self.measurement and self.field):
+            raise ValueError(f"Rule {cfg!r}: name, measurement and field are required")
+        self.op_str = str(cfg.get("op", ">="))
+        if self.op_str not in _OPS: raise ValueError(f"Rule '{self.name}': unknown op {self.op_str!r}")
+        self.op = _OPS[self.op_str]
+        self.warning  = None if cfg.get("warning")  is None else float(cfg["warning"])
+        self.critical = None if cfg.get("critical") is None else float(cfg["critical"])
+        if self.warning is None and self.critical is None:
+            raise ValueError(f"Rule '{self.name}': needs a warning and/or critical level")
+        self.for_s = float(cfg.get("for", 0)); self.hysteresis = float(cfg.get("hysteresis", 0))
+        self.message = cfg.get("message", "")
+        tags = {str(k): str(v) for k, v in (cfg.get("tags") or {}).items()}
+        self.exact = {k: v for k, v in tags.items() if not _GLOB & set(v)}
+        self.globs = {k: v for k, v in tags.items() if k not in self.exact}
+
+    def matches(self, tags: Dict[str, str]) -> bool:
+        for k, v in self.exact.items():
+            if tags.get(k) != v: return False
+        for k, pat in self.globs.items():
+            if k not in tags or not fnmatch.fnmatchcase(tags[k], pat): return False
+        return True
+
+    def threshold(self, severity: str) -> Optional[float]:
+        return self.critical if severity == Severity.CRITICAL else self.warning
+
+    def level(self, value: float, held: Optional[str]) -> Optional[str]:
+        """Severity for ``value``; a held severity is kept until the value leaves its hysteresis band."""
+        raw = None
+        if self.critical is not None and self.op(value, self.critical):  raw = Severity.CRITICAL
+        elif self.warning is not None and self.op(value, self.warning):  raw = Severity.WARNING
+        if held is None or not self.hysteresis or (raw and Severity.rank(raw) >= Severity.rank(held)): return raw
+        for sev in (Severity.CRITICAL, Severity.WARNING):
+            if Severity.rank(sev) > Severity.rank(held): continue
+            if raw and Severity.rank(raw) >= Severity.rank(sev): return raw
+            if self._in_band(value, sev): return sev
+        return raw
+
+    def _in_band(self, value: float, severity: str) -> bool:
+        thr = self.threshold(severity)
+        if thr is None: return False
+        if self.op_str in (">", ">="):  return value > thr - self.hysteresis
+        if self.op_str in ("<", "<="):  return value < thr + self.hysteresis
+        return False
+
+class _Series:
+    __slots__ = ("pending", "since", "firing", "seen")
+    def __init__(self):
+        self.pending: Optional[str] = None; self.since = 0.0; self.firing: Optional[str] = None; self.seen = 0.0
+
+class RuleEngine:
+    """Evaluates rules against the metric stream.
+
+    Rules are indexed by measurement and then by their first exact tag selector, so each metric
+    is only compared against rules that can possibly match it.
+    """
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules = list(rules)
+        self._index: Dict[str, Tuple[List[Rule], Dict[Tuple[str, str], List[Rule]]]] = {}
+        for r in self.rules:
+            wild, by_tag = self._index.setdefault(r.measurement, ([], {}))
+            if r.exact: by_tag.setdefault(next(iter(sorted(r.exact.items()))), []).append(r)
+            else:       wild.append(r)
+        self._state: Dict[Tuple[str, Tuple], _Series] = {}
+        self._lock = Lock(); self._last_prune = time.time()
+
+    @classmethod
+    def from_config(cls, rule_cfgs: List[Dict]) -> "RuleEngine":
+        rules = []
+        for rcfg in rule_cfgs or []:
+            try: rules.append(Rule(rcfg))
+            except (ValueError, TypeError) as e: log.error(f"Skipping invalid rule: {e}")
+        return cls(rules)
+
+    def inherit(self, previous: Optional["RuleEngine"]) -> None:
+        """Keep pending/firing state for rules that survive a config reload unchanged in name."""
+        if previous is None: return
+        names = {r.name for r in self.rules}
+        with previous._lock:
+            self._state.update({k: st for k, st in previous._state.items() if k[0] in names})
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def candidates(self, metric: Metric) -> List[Rule]:
+        entry = self._index.get(metric.measurement)
+        if entry is None: return []
+        wild, by_tag = entry
+        if not by_tag: return wild
+        found = list(wild)
+        for kv in metric.tags.items():
+            hit = by_tag.get(kv)
+            if hit: found.extend(hit)
+        return found
+
+    def evaluate(self, metrics: List[Metric], checked_ids: Optional[Set[str]] = None, adaptive=None,
+                 now: Optional[float] = None) -> List[Alert]:
+        alerts: List[Alert] = []
+        now = time.time() if now is None else now
+        with self._lock:
+            for m in metrics:
+                for rule in self.candidates(m):
+                    value = m.fields.get(rule.field)
+                    if isinstance(value, bool) or not isinstance(value, (int, float)): continue
+                    if not rule.matches(m.tags): continue
+                    if adaptive is not None and rule.op_str in _ORDERED:
+                        thr = rule.warning if rule.warning is not None else rule.critical
+                        adaptive.observe(f"rule:{self._alert_name(rule, m.tags)}", float(value), thr, rule.op_str in (">", ">="))
+                    alert = self._step(rule, m, float(value), now)
+                    if checked_ids is not None: checked_ids.add(f"rules:{self._alert_name(rule, m.tags)}")
+                    if alert: alerts.append(alert)
+            if now - self._last_prune >= _STALE: self._prune(now)
+        return alerts
+
+    def _step(self, rule: Rule, m: Metric, value: float, now: float) -> Optional[Alert]:
+        key = (rule.name, tuple(sorted(m.tags.items())))
+        st  = self._state.get(key)
+        if st is None: st = self._state[key] = _Series()
+        st.seen = now
+        sev = rule.level(value, st.firing)
+        if sev is None:
+            st.pending = st.firing = None; return None
+        if sev == st.firing: st.pending = None
+        elif st.firing and Severity.rank(sev) < Severity.rank(st.firing): st.firing, st.pending = sev, None
+        else:
+            if st.pending != sev: st.pending, st.since = sev, now
+            if now - st.since >= rule.for_s: st.firing, st.pending = sev, None
+        if st.firing is None: return None
+        thr = rule.threshold(st.firing)
+        msg = f"{m.measurement}.{rule.field} = {value:.2f} ({st.firing}: {rule.op_str} {thr:g})"
+        if rule.message:
+            try: msg = rule.message.format_map(dict(m.tags, value=value, threshold=thr, severity=st.firing))
+            except (KeyError, IndexError, ValueError): pass
+        return Alert(self._alert_name(rule, m.tags), msg, st.firing, "rules", dict(m.tags, rule=rule.name))
+
+    @staticmethod
+    def _alert_name(rule: Rule, tags: Dict[str, str]) -> str:
+        suffix = "_".join(v.replace("/", "_").replace(" ", "_") for k, v in sorted(tags.items()) if k != "host")
+        return f"{rule.name}_{suffix}" if suffix else rule.name
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, st in self._state.items() if now - st.seen >= _STALE]: del self._state[key]
+        self._last_prune = now
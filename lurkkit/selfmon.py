@@ -0,0 +1,135 @@
+from __future__ import annotations
+import logging, os, threading, time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+from lurkkit.models import Metric
+
+log = logging.getLogger(__name__)
+T   = TypeVar("T")
+
+class SelfStats:
+    """Counters, gauges and timings about the agent itself, drained as ``lurkkit.internal.*`` metrics.
+
+    Timings and counters are per-interval deltas and reset on every drain; gauges keep their
+    last value. Recording is a no-op until ``enabled`` is set.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._acc:    Dict[Tuple[str, Tuple], Dict[str, float]] = {}
+        self._gauges: Dict[Tuple[str, Tuple], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def timing(self, measurement: str, seconds: float, **tags: str) -> None:
+        if not self.enabled: return
+        ms = seconds * 1000
+        with self._lock:
+            f = self._acc.setdefault((measurement, tuple(sorted(tags.items()))), {})
+            f["count"] = f.get("count", 0) + 1; f["total_ms"] = f.get("total_ms", 0.0) + ms
+            if ms > f.get("max_ms", 0.0): f["max_ms"] = ms
+
+    def incr(self, measurement: str, field: str, n: int = 1, **tags: str) -> None:
+        if not self.enabled: return
+        with self._lock:
+            f = self._acc.setdefault((measurement, tuple(sorted(tags.items()))), {})
+            f[field] = f.get(field, 0) + n
+
+    def gauge(self, measurement: str, field: str, value: float, **tags: str) -> None:
+        if not self.enabled: return
+        with self._lock: self._gauges.setdefault((measurement, tuple(sorted(tags.items()))), {})[field] = value
+
+    @contextmanager
+    def timer(self, measurement: str, **tags: str) -> Iterator[None]:
+        if not self.enabled: yield; return
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.timing(measurement, time.perf_counter() - t0, **tags)
+
+    def drain(self, base_tags: Dict[str, str]) -> List[Metric]:
+        with self._lock:
+            acc, self._acc = self._acc, {}
+            series = {k: dict(v) for k, v in self._gauges.items()}
+        for k, f in acc.items(): series.setdefault(k, {}).update(f)
+        metrics = []
+        for (meas, tags), fields in series.items():
+            if "total_ms" in fields: fields["avg_ms"] = fields["total_ms"] / fields["count"]
+            metrics.append(Metric(f"lurkkit.internal.{meas}", fields, dict(base_tags, **dict(tags))))
+        return metrics
+
+class Profiler:
+    """Time-boxed cProfile or tracemalloc capture, started on demand (e.g. from SIGUSR1).
+
+    cProfile only sees the thread it is enabled in, so while a capture is active each
+    ``run()`` call profiles into its own ``Profile`` and the results are merged when the window ends.
+    Python 3.12+ allows one active profiler per process, so overlapping runs go unprofiled.
+    """
+    MODES = ("cprofile", "tracemalloc")
+
+    def __init__(self, mode: str = "cprofile", duration: float = 30, out_dir: str = "/tmp"):
+        self.configure(mode, duration, out_dir)
+        self._active = False; self._profiles: list = []; self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._slot  = threading.Lock()
+
+    def configure(self, mode: str = "cprofile", duration: float = 30, out_dir: str = "/tmp") -> None:
+        self.mode = mode if mode in self.MODES else "cprofile"; self.duration = float(duration); self.out_dir = out_dir
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def trigger(self) -> bool:
+        with self._lock:
+            if self._active: log.info("Profiler: capture already running"); return False
+            self._active = True; self._profiles = []
+        if self.mode == "tracemalloc":
+            import tracemalloc; tracemalloc.start(25)
+        self._timer = threading.Timer(self.duration, self._finish); self._timer.daemon = True; self._timer.start()
+        log.warning(f"Profiler: {self.mode} capture started for {self.duration:g}s")
+        return True
+
+    def run(self, fn: Callable[[], T]) -> T:
+        if not self._active or self.mode != "cprofile" or not self._slot.acquire(blocking=False): return fn()
+        try:
+            import cProfile
+            prof = cProfile.Profile()
+            try: prof.enable()
+            except ValueError: return fn()   # another profiling tool is active
+            try: return fn()
+            finally:
+                prof.disable()
+                with self._lock: self._profiles.append(prof)
+        finally: self._slot.release()
+
+    def _finish(self) -> None:
+        if self._timer: self._timer.cancel(); self._timer = None
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            if self.mode == "tracemalloc": path = self._dump_tracemalloc(stamp)
+            else:                          path = self._dump_cprofile(stamp)
+            if path: log.warning(f"Profiler: wrote {path}")
+        except Exception as e:
+            log.error(f"Profiler: failed to write profile: {e}")
+        finally:
+            with self._lock: self._active = False; self._profiles = []
+
+    def _dump_cprofile(self, stamp: str) -> str:
+        import pstats
+        with self._lock: profiles = list(self._profiles)
+        if not profiles: log.warning("Profiler: no collector runs during the capture window"); return ""
+        stats = pstats.Stats(profiles[0])
+        for p in profiles[1:]: stats.add(p)
+        path = os.path.join(self.out_dir, f"lurkkit-{os.getpid()}-{stamp}.prof")
+        stats.dump_stats(path)
+        return path
+
+    def _dump_tracemalloc(self, stamp: str) -> str:
+        import tracemalloc
+        snap = tracemalloc.take_snapshot(); tracemalloc.stop()
+        path = os.path.join(self.out_dir, f"lurkkit-{os.getpid()}-{stamp}.tracemalloc.txt")
+        with open(path, "w") as f:
+            for stat in snap.statistics("lineno")[:50]: f.write(f"{stat}\n")
+        return path
+
+stats    = SelfStats()
+profiler = Profiler()
@@ -1,9 +1,10 @@
 from __future__ import annotations
-import logging, socket, time, urllib.request
+import logging, socket, time
 from collections import deque
 from threading import Lock
 from typing import List, Optional
 from lurkkit.models import Metric
+from lurkkit.selfmon import stats
 
 log = logging.getLogger(__name__)
 
@@ -16,12 +17,11 @@ class InfluxDBSink:
         self.url = url; self.token = token
     def send(self, metrics: List[Metric]) -> None:
         if not metrics: return
+        import urllib.request
         payload = "\n".join(m.to_line_protocol() for m in metrics).encode()
         hdrs    = {"Content-Type": "text/plain; charset=utf-8"}
         if self.token: hdrs["Authorization"] = f"Token {self.token}"
-        try:
-            with urllib.request.urlopen(urllib.request.Request(self.url, data=payload, headers=hdrs, method="POST"), timeout=5): pass
-        except Exception as e: log.warning(f"InfluxDB failed: {e}")
+        with urllib.request.urlopen(urllib.request.Request(self.url, data=payload, headers=hdrs, method="POST"), timeout=5): pass
 
 class StatsDSink:
     def __init__(self, host: str = "localhost", port: int = 8125):
@@ -32,34 +32,82 @@ class StatsDSink:
             for line in m.to_statsd():
                 try: self._sock.sendto(line.encode(), (self.host, self.port))
                 except Exception as e: log.warning(f"StatsD failed: {e}")
+    def close(self) -> None:
+        self._sock.close()
+
+class RelaySink:
+    """Streams line protocol to a ``lurkkit --relay`` over one persistent TCP connection."""
+    def __init__(self, host: str = "localhost", port: int = 8094, timeout: float = 5):
+        self.host = host; self.port = port; self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+    def send(self, metrics: List[Metric]) -> None:
+        if not metrics: return
+        payload = ("\n".join(m.to_line_protocol() for m in metrics) + "\n").encode()
+        for attempt in (0, 1):
+            try:
+                if self._sock is None: self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                self._sock.sendall(payload); return
+            except OSError:
+                if self._sock: self._sock.close()
+                self._sock = None
+                if attempt: raise
+    def close(self) -> None:
+        if self._sock: self._sock.close(); self._sock = None
 
 def make_sink(cfg: dict) -> Optional[object]:
     if not cfg.get("enabled", False): return None
     t = cfg.get("type", "stdout")
     if t == "influxdb": return InfluxDBSink(cfg.get("url", "http://localhost:8086/write?db=lurkkit"), cfg.get("token", ""))
     if t == "statsd":   return StatsDSink(cfg.get("statsd_host", "localhost"), int(cfg.get("statsd_port", 8125)))
+    if t == "relay":    return RelaySink(cfg.get("relay_host", "localhost"), int(cfg.get("relay_port", 8094)))
     return StdoutSink()
 
 class MetricBuffer:
     def __init__(self, sink, batch_size: int = 20, flush_interval: int = 10):
         self.sink = sink; self.batch_size = batch_size; self.flush_interval = flush_interval
-        self._buf: deque = deque(); self._lock = Lock(); self._last_flush = time.time()
+        self._buf: deque = deque(); self._lock = Lock(); self._send_lock = Lock(); self._last_flush = time.time()
+
+    def reconfigure(self, sink, batch_size: int = 20, flush_interval: int = 10) -> None:
+        """Swap the sink in place; the replaced one is closed once no batch is being sent through it."""
+        with self._send_lock, self._lock:
+            old = self.sink; self.sink = sink; self.batch_size = batch_size; self.flush_interval = flush_interval
+        if old is not sink: self._close(old)
+
+    def close(self) -> None:
+        with self._send_lock: self._close(self.sink)
+
+    @staticmethod
+    def _close(sink) -> None:
+        close = getattr(sink, "close", None)
+        if close:
+            try: close()
+            except Exception as e: log.warning(f"Closing {sink.__class__.__name__} failed: {e}")
 
     def add(self, metrics: List[Metric]) -> None:
         if not self.sink or not metrics: return
-        with self._lock: self._buf.extend(metrics)
+        with self._lock: self._buf.extend(metrics); depth = len(self._buf)
+        stats.gauge("buffer", "queue_size", depth)
         self._maybe_flush()
 
     def _maybe_flush(self) -> None:
         with self._lock:
             should = len(self._buf) >= self.batch_size or (time.time() - self._last_flush) >= self.flush_interval
             batch  = (list(self._buf), self._buf.clear() or True, setattr(self, '_last_flush', time.time()))[0] if should and self._buf else []
-        if batch:
-            try: self.sink.send(batch)
-            except Exception as e: log.error(f"Flush error: {e}")
+        if batch: self._send(batch)
 
     def flush(self) -> None:
         with self._lock: batch = list(self._buf); self._buf.clear()
-        if batch and self.sink:
-            try: self.sink.send(batch)
-            except Exception as e: log.error(f"Final flush error: {e}")
+        if batch and self.sink: self._send(batch)
+
+    def _send(self, batch: List[Metric]) -> None:
+        # One batch at a time: sinks share one socket, and reconfigure() must not close a sink mid-send.
+        with self._send_lock:
+            sink = self.sink.__class__.__name__
+            t0   = time.perf_counter()
+            try:
+                self.sink.send(batch)
+                stats.incr("buffer", "flushed", len(batch))
+            except Exception as e:
+                stats.incr("sink", "failures", sink=sink); stats.incr("buffer", "dropped", len(batch))
+                log.error(f"Flush error ({sink}, {len(batch)} metrics dropped): {e}")
+            stats.timing("sink", time.perf_counter() - t0, sink=sink)
@@ -43,6 +43,7 @@ After=network.target
 Type=simple
 User=$SERVICE_USER
 ExecStart=$LURKKIT_BIN --config $CONFIG_DIR/lurkkit.yaml
+ExecReload=/bin/kill -HUP \$MAINPID
 Restart=on-failure
 RestartSec=10
 MemoryLimit=128M
@@ -1,5 +1,5 @@
 """LurkKit test suite. Run: pytest tests/ -v"""
-import os, tempfile
+import os, tempfile, time
 from unittest.mock import MagicMock
 from lurkkit.models import Alert, Metric, Severity
 from lurkkit.config import deep_merge, DEFAULTS
@@ -49,6 +49,17 @@ def test_cooldown_suppresses():
     mgr.process([a], {a.id}); mgr.process([a], {a.id})
     assert p.send.call_count == 1
 
+def test_escalation_bypasses_cooldown():
+    from lurkkit.rules import RuleEngine
+    p, np = MagicMock(), MagicMock()
+    mgr   = AlertManager([p], [np], paging_severities=["critical"], cooldown=300)
+    rules = RuleEngine.from_config([{"name": "disk", "measurement": "system.disk", "field": "usage_percent", "warning": 80, "critical": 95}])
+    for t, pct in ((0, 85), (60, 99), (120, 99), (180, 99)):
+        checked: set = set()
+        mgr.process(rules.evaluate([_disk(pct)], checked, now=1e9 + t), checked, now=1e9 + t)
+    assert [c[0][0].severity for c in np.send.call_args_list] == ["warning", "critical"] and p.send.call_count == 1
+    assert mgr._state.severity(p.send.call_args[0][0].id) == "critical"
+
 def test_auto_resolve():
     p   = MagicMock()
     mgr = AlertManager([p], [], paging_severities=["critical"], cooldown=300)
@@ -89,6 +100,63 @@ def test_http_collector_down():
     _, alerts = HttpCollector({"interval": 60, "checks": [{"name": "Bad", "url": "http://localhost:19997/", "timeout": 1, "expect_status": 200}]}, HOSTNAME).collect()
     assert len(alerts) == 1 and alerts[0].severity == Severity.CRITICAL
 
+def test_http_dns_lookup_bounded_by_timeout(monkeypatch):
+    import socket
+    from lurkkit.collectors import http
+    real = socket.getaddrinfo
+    def slow(host, port, *a, flags=0, **kw):
+        if flags & socket.AI_NUMERICHOST: return real(host, port, *a, flags=flags, **kw)
+        time.sleep(2); return real("127.0.0.1", port, *a, **kw)
+    monkeypatch.setattr(http.socket, "getaddrinfo", slow)
+    t0 = time.monotonic()
+    _, alerts = http.HttpCollector({"checks": [{"name": "slow", "url": "http://slow.invalid/", "timeout": 0.2}]}, HOSTNAME).collect()
+    assert time.monotonic() - t0 < 1 and "DNS lookup of slow.invalid timed out" in alerts[0].message
+    assert http.Resolver().resolve("127.0.0.1", 80, timeout=0.2)[0][4] == ("127.0.0.1", 80)
+
+def test_http_collector_phases_and_keepalive():
+    import http.server, threading
+    from lurkkit.collectors.http import HttpCollector
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def do_GET(self):
+            if self.path == "/old": self.send_response(301); self.send_header("Location", "/health"); self.send_header("Content-Length", "0"); self.end_headers(); return
+            self.send_response(200); self.send_header("Content-Length", "2"); self.end_headers(); self.wfile.write(b"ok")
+        def log_message(self, *a): pass
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler); threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    col  = HttpCollector({"interval": 60, "dns_cache_ttl": 60, "checks": [
+        {"name": "warm", "url": f"{base}/health", "keepalive": True, "expect_body": "ok", "max_ms": {"ttfb": 0.000001}},
+        {"name": "moved", "url": f"{base}/old"}]}, HOSTNAME)
+    try:
+        col.collect(); metrics, alerts = col.collect()
+        warm, moved = (m.fields for m in metrics)
+        assert warm["up"] == 1 and warm["reused"] == 1 and warm["connect_ms"] == 0 and warm["ttfb_ms"] > 0
+        assert moved["up"] == 1 and moved["redirects"] == 1 and "tls_ms" not in moved
+        assert [a.name for a in alerts] == ["http_slow_warm_ttfb"] and alerts[0].severity == Severity.WARNING
+    finally:
+        col.close(); srv.shutdown()
+
+def test_http_check_honours_proxy_env(monkeypatch):
+    import http.server, threading
+    from lurkkit.collectors.http import HttpCollector
+    seen = []
+    class Proxy(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen.append(self.path)
+            if self.path.endswith("/old"): self.send_response(302); self.send_header("Location", "/health"); self.end_headers(); return
+            self.send_response(200); self.send_header("Content-Length", "2"); self.end_headers(); self.wfile.write(b"ok")
+        def log_message(self, *a): pass
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Proxy); threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setenv("http_proxy", f"http://127.0.0.1:{srv.server_address[1]}"); monkeypatch.setenv("no_proxy", "bypass.invalid")
+    try:
+        metrics, alerts = HttpCollector({"checks": [{"name": "via", "url": "http://app.invalid/old", "expect_body": "ok"},
+                                                    {"name": "direct", "url": "http://bypass.invalid/", "timeout": 1}]}, HOSTNAME).collect()
+        via, direct = (m.fields for m in metrics)
+        assert seen == ["http://app.invalid/old", "http://app.invalid/health"] and via["up"] == 1 and via["redirects"] == 1
+        assert set(via) == {"status_code", "up", "ttfb_ms", "response_ms", "redirects"} and direct["up"] == 0 and "dns_ms" in direct
+    finally:
+        srv.shutdown()
+
 def test_log_collector():
     from lurkkit.collectors.logs import LogCollector
     with tempfile.NamedTemporaryFile(mode="w", suffix=".log", delete=False) as f:
@@ -98,3 +166,413 @@ def test_log_collector():
         assert len(alerts) == 1
     finally:
         os.unlink(path)
+
+# Rules
+def _disk(pct, mount="/"):
+    return Metric("system.disk", {"usage_percent": pct}, {"host": HOSTNAME, "mount": mount})
+
+def test_rule_engine_levels_and_index():
+    from lurkkit.rules import RuleEngine
+    eng = RuleEngine.from_config([{"name": "disk", "measurement": "system.disk", "field": "usage_percent",
+                                   "tags": {"mount": "/"}, "warning": 80, "critical": 95}])
+    assert eng.candidates(_disk(50, "/data")) == [] and eng.candidates(Metric("system.cpu", {}, {})) == []
+    ids = set()
+    assert eng.evaluate([_disk(50)], ids) == [] and ids == {"rules:disk__"}
+    assert [a.severity for a in eng.evaluate([_disk(85), _disk(99, "/data")])] == [Severity.WARNING]
+    assert eng.evaluate([_disk(96)])[0].severity == Severity.CRITICAL
+
+def test_rule_for_and_hysteresis():
+    from lurkkit.rules import RuleEngine
+    eng = RuleEngine.from_config([{"name": "cpu", "measurement": "system.cpu", "field": "usage_percent",
+                                   "warning": 80, "for": 60, "hysteresis": 5}])
+    cpu = lambda v: Metric("system.cpu", {"usage_percent": v}, {"host": HOSTNAME})
+    assert eng.evaluate([cpu(90)]) == []
+    next(iter(eng._state.values())).since -= 61
+    assert len(eng.evaluate([cpu(90)])) == 1
+    assert len(eng.evaluate([cpu(77)])) == 1
+    assert eng.evaluate([cpu(74)]) == []
+
+def test_invalid_rule_skipped():
+    from lurkkit.rules import RuleEngine
+    assert len(RuleEngine.from_config([{"name": "x", "measurement": "m", "field": "f", "op": "~"}, {"name": "y"}])) == 0
+
+def test_rule_alert_not_resolved_by_other_collector():
+    from lurkkit.agent import CollectorThread
+    from lurkkit.rules import RuleEngine
+    pager = MagicMock(); mgr = AlertManager([pager], [], cooldown=300)
+    rules = RuleEngine.from_config([{"name": "cpu", "measurement": "system.cpu", "field": "usage_percent", "critical": 90}])
+    cpu   = MagicMock(adaptive=None); cpu.collect.return_value = ([Metric("system.cpu", {"usage_percent": 95.0}, {"host": HOSTNAME})], [])
+    quiet = MagicMock(adaptive=None); quiet.collect.return_value = ([Metric("log.matches", {"count": 1}, {"host": HOSTNAME})], [])
+    buf   = MetricBuffer(None)
+    a, b  = CollectorThread("system", cpu, buf, mgr, rules), CollectorThread("logs", quiet, buf, mgr, rules)
+    a.run_once(); b.run_once(); a.run_once(); b.run_once()
+    assert pager.send.call_count == 1 and not pager.send.call_args[0][0].resolved
+    cpu.collect.return_value = ([Metric("system.cpu", {"usage_percent": 10.0}, {"host": HOSTNAME})], [])
+    a.run_once()
+    assert pager.send.call_count == 2 and pager.send.call_args[0][0].resolved
+
+# Adaptive interval
+def test_adaptive_interval(monkeypatch):
+    from lurkkit import adaptive
+    from lurkkit.rules import RuleEngine
+    now = [100.0]; monkeypatch.setattr(adaptive.time, "monotonic", lambda: now[0])
+    a = adaptive.AdaptiveInterval.from_config({"enabled": True, "min_interval": 5, "margin": 0.1, "backoff": 2}, 30)
+    a.observe("cpu", 40, 85); assert a.next() == 30
+    a.observe("cpu", 80, 85); assert a.next() == 5                       # inside the 10% margin
+    a.observe("cpu", 40, 85); assert [a.next(), a.next(), a.next()] == [10, 20, 30]
+    now[0] += 10; a.observe("cpu", 60, 85); assert a.next() == 5         # +2/s would cross the band within 30s
+    engine = RuleEngine.from_config([{"name": "free", "measurement": "disk", "field": "free_gb", "op": "<", "warning": 10}])
+    engine.evaluate([Metric("disk", {"free_gb": 10.5}, {"host": "h"})], adaptive=a)
+    assert a.next() == 5
+
+# Alert state
+def test_alert_state_ttl_and_cap():
+    from lurkkit.alert_state import AlertStateStore
+    st = AlertStateStore(ttl=100, max_entries=2)
+    st.fire("a", 0); st.fire("b", 10); st.fire("c", 20)
+    assert len(st) == 2 and st.last_fired("a") == 0.0
+    st.fire("b", 50); st.expire(125)
+    assert set(st._last) == {"b"} and st.firing == {"b"}
+
+def test_alert_state_survives_restart():
+    p = MagicMock()
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "state.json")
+        a    = Alert("cpu", "high", Severity.CRITICAL, "system")
+        mgr  = AlertManager([p], [], cooldown=300, state_file=path)
+        mgr.process([a], {a.id}); mgr.save_state()
+        mgr2 = AlertManager([p], [], cooldown=300, state_file=path)
+        mgr2.process([a], {a.id})
+        assert p.send.call_count == 1 and mgr2.firing_count == 1
+
+# Coalescing
+def test_coalesced_digest():
+    np  = MagicMock()
+    mgr = AlertManager([], [np], cooldown=0, coalesce_window=60, digest_max_lines=3)
+    storm = [Alert(f"log_{i}", "boom", Severity.WARNING, "logs", {"host": HOSTNAME}) for i in range(50)]
+    mgr.process(storm, set())
+    assert np.send.call_count == 0
+    mgr.flush()
+    sent = np.send.call_args[0][0]
+    assert np.send.call_count == 1 and sent.tags["count"] == "50" and "+47 more" in sent.message
+
+def test_coalescing_pages_individual_alerts():
+    p, np = MagicMock(), MagicMock()
+    mgr = AlertManager([p], [np], cooldown=0, coalesce_window=60)
+    storm = [Alert(f"disk_{i}", "full", Severity.CRITICAL, "system", {"host": HOSTNAME}) for i in range(2)]
+    mgr.process(storm, {a.id for a in storm}); mgr.flush()
+    assert [c[0][0].id for c in p.send.call_args_list] == ["system:disk_0", "system:disk_1"]
+    assert np.send.call_count == 1 and np.send.call_args[0][0].tags["count"] == "2"
+    mgr.process([], {a.id for a in storm}); mgr.flush()
+    resolves = [c[0][0] for c in p.send.call_args_list[2:]]
+    assert sorted((a.id, a.resolved) for a in resolves) == [("system:disk_0", True), ("system:disk_1", True)]
+
+def test_rate_limit_overflow_summary():
+    from lurkkit.coalescer import Coalescer
+    np = MagicMock()
+    co = Coalescer(lambda a: [np], limits={np: (0.001, 2)})
+    for i in range(5): co.add(Alert(f"a{i}", "x", Severity.WARNING, "system"))
+    assert np.send.call_count == 2 and co._dropped[np] == 3
+    co._buckets[np]._tokens = 1; co.flush()
+    assert "+3 more" in np.send.call_args[0][0].message
+
+def test_rate_limited_paging_is_held_not_dropped():
+    from lurkkit.coalescer import Coalescer
+    p, np = MagicMock(), MagicMock()
+    co = Coalescer(lambda a: [p, np], limits={p: (0.001, 1), np: (0.001, 1)}, paging=[p])
+    for i in range(3): co.add(Alert(f"a{i}", "x", Severity.CRITICAL, "system"))
+    co.add(Alert("a1", "ok", Severity.INFO, "system", resolved=True))
+    assert p.send.call_count == 1 and list(co._held[p]) == ["system:a2", "system:a1"] and co._dropped == {np: 3}
+    for b in co._buckets.values(): b._tokens = 1
+    co.flush()
+    assert p.send.call_args[0][0].id == "system:a2" and "+3 more" in np.send.call_args[0][0].message
+    co.flush(drain=True)
+    assert p.send.call_count == 3 and p.send.call_args[0][0].resolved and not co._held[p]
+
+def test_log_collector_folds_matches():
+    from lurkkit.collectors.logs import LogCollector
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".log", delete=False) as f:
+        f.write("".join(f"ERROR: broke {i}\n" for i in range(1000))); path = f.name
+    try:
+        metrics, alerts = LogCollector({"interval": 15, "files": [{"path": path, "tail_lines": 5000, "samples": 2,
+                                        "patterns": [{"regex": "error", "severity": "warning"}]}]}, HOSTNAME).collect()
+        assert len(alerts) == 1 and alerts[0].tags["count"] == "1000" and alerts[0].message.count("ERROR: broke") == 2
+        assert [m.fields["count"] for m in metrics] == [1000]
+    finally:
+        os.unlink(path)
+
+def test_log_match_timestamps():
+    from lurkkit.collectors.logs import line_time, scan_lines
+    assert line_time("2026-03-01T10:00:00.5Z ERROR x", 0) == 1772359200.5
+    assert line_time("[2026-03-01 11:00:00+01:00] ERROR x", 0) == 1772359200
+    assert line_time("no timestamp here", 42.0) == 42.0
+    now = time.time(); syslog = line_time(time.strftime("%b %e %H:%M:%S", time.localtime(now - 60)) + " host app: ERROR", now)
+    assert abs(syslog - (now - 60)) < 1
+    rec = scan_lines(["2026-03-01T10:00:00Z ERROR a", "2026-03-01T10:00:01Z ok", "2026-03-01T10:05:00Z ERROR b"], [{"regex": "error"}])["error"]
+    assert (rec.count, rec.first_ts, rec.last_ts) == (2, 1772359200, 1772359500)
+
+def test_log_collector_worker_pool(tmp_path):
+    from lurkkit.collectors.logs import LogCollector, shard_ranges
+    path = tmp_path / "app.log"; path.write_text("boot\n")
+    fdef = {"path": str(path), "samples": 2, "patterns": [{"regex": "error", "severity": "warning"}]}
+    lc = LogCollector({"interval": 15, "workers": 2, "shard_mb": 0.0005, "files": [fdef]}, HOSTNAME)
+    try:
+        assert lc.collect() == ([], [])
+        with open(path, "a") as f: f.write("".join(f"ERROR: broke {i}\n" for i in range(300)) + "INFO ok\n")
+        shards = shard_ranges(str(path), 5, path.stat().st_size, lc.shard_size)
+        assert len(shards) > 2 and all(path.read_bytes()[s - 1:s] == b"\n" for s, _ in shards)
+        metrics, alerts = lc.collect()
+        assert [m.fields["count"] for m in metrics] == [300] and alerts[0].tags["count"] == "300"
+    finally:
+        lc.close()
+
+def test_log_collector_recovers_broken_pool(tmp_path):
+    from lurkkit.collectors.logs import LogCollector
+    path = tmp_path / "app.log"; path.write_text("boot\n")
+    lc = LogCollector({"interval": 15, "workers": 1, "files": [{"path": str(path), "patterns": [{"regex": "error"}]}]}, HOSTNAME)
+    try:
+        lc.collect(); dead = lc._pool
+        for p in list(dead._processes.values()): p.kill(); p.join()
+        with open(path, "a") as f: f.write("ERROR one\n")
+        lc.collect()
+        with open(path, "a") as f: f.write("ERROR two\n")
+        metrics, _ = lc.collect()
+        assert lc._pool is not dead and [m.fields["count"] for m in metrics] == [2]   # the failed run's bytes are rescanned
+    finally:
+        lc.close()
+
+def test_match_summary_merge_is_uniform():
+    from lurkkit.collectors.logs import MatchSummary
+    hits = {"a": 0, "b": 0}
+    for _ in range(2000):
+        a, b = MatchSummary(), MatchSummary()
+        for _ in range(10): a.add("a", 1)
+        for _ in range(90): b.add("b", 1)
+        a.merge(b, 1); hits[a.samples[0]] += 1
+        assert a.count == 100
+    assert 100 < hits["a"] < 320   # ~10% from the small shard, not always the first shard
+
+def _fake_proc(pid, name, cpu_t=1.0, rss_mb=10, io=0):
+    p = MagicMock(pid=pid)
+    p.info = {"pid": pid, "name": name, "cpu_times": MagicMock(user=cpu_t, system=0.0),
+              "memory_info": MagicMock(rss=rss_mb * 1024 * 1024), "io_counters": MagicMock(read_bytes=io, write_bytes=0)}
+    p.cpu_percent.return_value = 1.0; p.memory_info.return_value = p.info["memory_info"]
+    return p
+
+def test_process_pid_series_rollup(monkeypatch):
+    from lurkkit.collectors import process
+    procs = [_fake_proc(pid, "gunicorn") for pid in range(100, 110)]
+    monkeypatch.setattr(process.psutil, "process_iter", lambda attrs=None: iter(procs))
+    metrics, _ = process.ProcessCollector({"max_pid_series": 3, "watch": [{"name": "gunicorn"}]}, HOSTNAME).collect()
+    pids = [m.tags["pid"] for m in metrics if m.measurement == "process.stats"]
+    assert pids == ["100", "101", "102", "other"] and metrics[-1].fields["count"] == 7
+
+def test_top_process_collector(monkeypatch):
+    from lurkkit.collectors import top
+    procs = [_fake_proc(pid, f"p{pid}", rss_mb=pid) for pid in range(1, 501)]
+    monkeypatch.setattr(top.psutil, "process_iter", lambda attrs=None: iter(procs))
+    col = top.TopProcessCollector({"k": 3, "by": ["rss"]}, HOSTNAME)
+    col.collect(); col._prev_ts -= 1
+    metrics, _ = col.collect()
+    ranked = [m for m in metrics if m.measurement == "process.top"]
+    assert [m.fields["pid"] for m in ranked] == [500, 499, 498] and ranked[0].fields["process"] == "p500"
+    assert ranked[0].tags == {"host": HOSTNAME, "by": "rss", "rank": "1"} and "process.top.process" not in " ".join(ranked[0].to_statsd())
+
+def test_cgroup_collector(tmp_path, monkeypatch):
+    from lurkkit.collectors import cgroup
+    def unit(rel, usage, mem, oom=0):
+        d = tmp_path / rel; d.mkdir(parents=True, exist_ok=True)
+        (d / "cpu.stat").write_text(f"usage_usec {usage}\nuser_usec {usage}\nsystem_usec 0\n")
+        (d / "memory.current").write_text(f"{mem}\n"); (d / "memory.max").write_text("1000\n")
+        (d / "memory.events").write_text(f"low 0\nhigh 0\nmax 0\noom 0\noom_kill {oom}\n")
+        (d / "io.stat").write_text("8:0 rbytes=100 wbytes=0 rios=1 wios=0\n8:16 rbytes=100 wbytes=0 rios=1 wios=0\n")
+        (d / "memory.pressure").write_text("some avg10=1.50 avg60=0.00 avg300=0.00 total=0\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n")
+    (tmp_path / "cgroup.controllers").write_text("cpu io memory\n")
+    unit("system.slice/web.service", 0, 500); unit("system.slice/db.service", 0, 850); unit("system.slice/x.mount", 0, 0)
+    now = [1000.0]; monkeypatch.setattr(cgroup.time, "monotonic", lambda: now[0])
+    col = cgroup.CgroupCollector({"interval": 30, "root": str(tmp_path), "exclude": ["*.mount"], "include": ["system.slice/*"],
+                                  "thresholds": {"memory_percent": 90, "oom_kills": 1},
+                                  "overrides": [{"match": "*/db.service", "thresholds": {"memory_percent": 80}}]}, HOSTNAME)
+    _, alerts = col.collect()
+    assert col._selected == ["system.slice/db.service", "system.slice/web.service"]
+    assert [a.name for a in alerts] == ["cgroup_memory_percent_system.slice_db.service"]
+    now[0] += 10; unit("system.slice/web.service", 5_000_000, 500, oom=2); unit("system.slice/api.service", 0, 1)
+    metrics, alerts = col.collect()
+    web = {m.measurement: m.fields for m in metrics if m.tags["name"] == "web.service"}
+    assert web["cgroup.cpu"]["usage_percent"] == 50.0 and web["cgroup.memory"]["oom_kill_events"] == 2
+    assert web["cgroup.pressure"]["some_avg10"] == 1.5 and web["cgroup.io"]["rbytes_per_s"] == 0
+    assert "system.slice/api.service" in col._selected and any(a.name.startswith("cgroup_oom_kills") for a in alerts)
+
+# Self-instrumentation
+def test_self_stats_drain():
+    from lurkkit.selfmon import SelfStats
+    st = SelfStats(); st.timing("collector", 0.5, collector="x")
+    assert st.drain({}) == []
+    st.enabled = True
+    st.timing("collector", 0.5, collector="x"); st.timing("collector", 1.5, collector="x")
+    st.incr("collector", "overruns", collector="x"); st.gauge("buffer", "queue_size", 7)
+    by_name = {m.measurement: m for m in st.drain({"host": HOSTNAME})}
+    c = by_name["lurkkit.internal.collector"]
+    assert c.fields["count"] == 2 and c.fields["avg_ms"] == 1000 and c.fields["overruns"] == 1 and c.tags["collector"] == "x"
+    assert [m.measurement for m in st.drain({})] == ["lurkkit.internal.buffer"]
+
+def test_buffer_counts_dropped_batches(monkeypatch):
+    from lurkkit import selfmon
+    st = selfmon.SelfStats(); st.enabled = True
+    monkeypatch.setattr("lurkkit.telemetry.stats", st)
+    sink = MagicMock(); sink.send.side_effect = OSError("down")
+    MetricBuffer(sink, batch_size=2, flush_interval=9999).add([Metric("cpu", {"pct": 1.0}, {})] * 2)
+    fields = {m.measurement: m.fields for m in st.drain({})}
+    assert fields["lurkkit.internal.buffer"]["dropped"] == 2 and fields["lurkkit.internal.sink"]["failures"] == 1
+
+def test_profiler_writes_cprofile():
+    from lurkkit.selfmon import Profiler
+    with tempfile.TemporaryDirectory() as d:
+        prof = Profiler("cprofile", duration=60, out_dir=d)
+        assert prof.trigger() and not prof.trigger()
+        assert prof.run(lambda: sum(range(1000))) == 499500
+        assert prof.run(lambda: prof.run(lambda: 7)) == 7      # overlapping run goes unprofiled instead of raising
+        prof._finish()
+        assert not prof.active and any(f.endswith(".prof") for f in os.listdir(d))
+
+# Registry
+def test_registry_builtin_and_unknown():
+    from lurkkit import registry
+    from lurkkit.collectors.system import SystemCollector
+    assert registry.load_collector("system") is SystemCollector
+    assert registry.load_alerter("pagerduty").paging is True and registry.load_alerter("slack").paging is False
+    assert registry.load_collector("no_such_collector") is None
+
+def test_agent_builds_entry_point_plugins(monkeypatch):
+    from lurkkit import registry
+    from lurkkit.agent import LurkKitAgent
+    from lurkkit.alerters.base import BaseAlerter
+    from lurkkit.collectors.base import BaseCollector
+    class Redis(BaseCollector):
+        def collect(self): return [], []
+    class Teams(BaseAlerter):
+        paging = True
+        def __init__(self, cfg): self.cfg = cfg
+        def send(self, alert): pass
+    eps = {registry.COLLECTOR_GROUP: {"redis": MagicMock(load=lambda: Redis)},
+           registry.ALERTER_GROUP:   {"teams": MagicMock(load=lambda: Teams)}}
+    monkeypatch.setattr(registry, "entry_points", lambda group: eps[group])
+    cfg = deep_merge(DEFAULTS, {"monitors": {"system": {"enabled": False}, "redis": {"enabled": True}, "bogus": {"enabled": True}},
+                                "alerting": {"teams": {"enabled": True}}})
+    agent = LurkKitAgent(cfg); agent._build()
+    assert [t.key for t in agent._threads] == ["redis"]
+    assert [type(a) for a in agent._alert_mgr.paging_alerters] == [Teams]
+
+# Hot reload
+def test_reload_restarts_only_changed_collectors():
+    from lurkkit.agent import LurkKitAgent
+    base  = {"telemetry": {"enabled": True, "type": "stdout"},
+             "monitors": {"system": {"enabled": True}, "logs": {"enabled": True, "files": [{"path": "/var/log/a"}]}}}
+    agent = LurkKitAgent(deep_merge(DEFAULTS, base)); agent._build()
+    system, logs = agent._collectors["system"][1], agent._collectors["logs"][1]
+    logs.collector._positions["/var/log/a"] = 1234
+    buf, mgr = agent._buffer, agent._alert_mgr
+    buf._buf.append(Metric("cpu", {"pct": 1.0}, {}))
+    new = deep_merge(DEFAULTS, deep_merge(base, {"telemetry": {"batch_size": 99}, "alerting": {"cooldown": 60},
+                                                 "monitors": {"logs": {"files": [{"path": "/var/log/a"}, {"path": "/var/log/b"}]}}}))
+    agent.reload(new)
+    assert agent._collectors["system"][1] is system and agent._collectors["logs"][1] is not logs
+    assert agent._collectors["logs"][1].collector._positions == {"/var/log/a": 1234}
+    assert agent._buffer is buf and buf.batch_size == 99 and len(buf._buf) == 1
+    assert agent._alert_mgr is mgr and mgr.cooldown == 60
+    assert logs not in agent._threads and len(agent._threads) == 2
+
+def test_reload_closes_replaced_sink():
+    from lurkkit.agent import LurkKitAgent
+    base  = {"telemetry": {"enabled": True, "type": "statsd"}, "monitors": {"system": {"enabled": True}}}
+    agent = LurkKitAgent(deep_merge(DEFAULTS, base)); agent._build()
+    old   = agent._buffer.sink
+    agent.reload(deep_merge(DEFAULTS, deep_merge(base, {"telemetry": {"statsd_port": 8126}})))
+    assert agent._buffer.sink is not old and old._sock.fileno() == -1 and agent._buffer.sink._sock.fileno() != -1
+    agent._buffer.close()
+    assert agent._buffer.sink._sock.fileno() == -1
+
+def test_reload_failure_keeps_running_config():
+    from lurkkit.agent import LurkKitAgent
+    base  = {"telemetry": {"enabled": True, "type": "stdout"}, "monitors": {"system": {"enabled": True}}}
+    agent = LurkKitAgent(deep_merge(DEFAULTS, base)); agent._build()
+    cfg, sink, system, alerters = agent.cfg, agent._buffer.sink, agent._collectors["system"][1], agent._alert_mgr.non_paging_alerters
+    bad = deep_merge(DEFAULTS, deep_merge(base, {"telemetry": {"type": "statsd", "statsd_port": "81x25"}, "alerting": {"cooldown": 5},
+                                                 "monitors": {"system": {"interval": 1}}}))
+    agent.reload(bad)
+    assert agent.cfg is cfg and agent._buffer.sink is sink and agent._alert_mgr.non_paging_alerters == alerters
+    assert agent._alert_mgr.cooldown == DEFAULTS["alerting"]["cooldown"] and agent._collectors["system"][1] is system
+
+# Relay
+def test_relay_parses_and_aggregates():
+    from lurkkit.relay import RelayWorker, LP, STATSD, parse_statsd
+    assert parse_statsd("api.hits:2|c|@0.5|#env:prod") == ("api.hits", 2.0, "c", 0.5, ",env=prod")
+    sent = []
+    w = RelayWorker({"gzip": False, "aggregate": True, "spool_dir": ""}, post=sent.append)
+    w.feed(LP, b'cpu,host=a usage=1i 100\ncpu,host=a usage=3i,note="x, y" 200\nbroken\n')
+    w.feed(STATSD, b"hits:1|c\nhits:2|c|@0.5\nlat:10|ms\nlat:30|ms\n")
+    w.flush()
+    lines = sent[0].decode().splitlines()
+    assert 'cpu,host=a usage=3i,note="x, y" 200' in lines
+    assert any(l.startswith("hits value=5.0 ") for l in lines)
+    assert any(l.startswith("lat count=2i,mean=20.0,min=10.0,max=30.0 ") for l in lines)
+    assert w.dropped == 1 and w.points_out == 3
+
+def test_relay_routes_series_to_one_worker():
+    import queue
+    from lurkkit.relay import Relay, LP, STATSD
+    r = Relay({"workers": 4, "aggregate": True, "queue_size": 8})
+    data = b"\n".join(b"cpu,host=h%d usage=%di" % (i % 5, i) for i in range(40))
+    for _ in range(3):
+        owner = {}
+        for i, chunk in r.route(LP, data):
+            for line in chunk.split(b"\n"): assert owner.setdefault(line.split(b" ")[0], i) == i
+        assert sum(len(c.split(b"\n")) for _, c in r.route(LP, data)) == 40
+    parts = r.route(STATSD, b"hits:1|c|#b:2,a:1\nhits:2|c|#a:1,b:2\nlat:3|ms")
+    assert any(c == b"hits:1|c|#b:2,a:1\nhits:2|c|#a:1,b:2" for _, c in parts)
+    r._queues = [MagicMock(put=MagicMock(side_effect=queue.Full))]
+    r.submit(STATSD, b"hits:1|c"); r.submit(LP, b"m v=1", block=True)
+    assert (r.udp_dropped, r.tcp_dropped) == (1, 1)
+
+def test_relay_spools_and_replays(tmp_path):
+    import gzip
+    from lurkkit.relay import RelayWorker, LP
+    sent, down = [], [True]
+    def post(payload):
+        if down[0]: raise OSError("upstream down")
+        sent.append(gzip.decompress(payload).decode())
+    w = RelayWorker({"spool_dir": str(tmp_path)}, post=post)
+    w.feed(LP, b"m v=1 1\n"); w.flush()
+    assert len(list(tmp_path.iterdir())) == 1 and not sent
+    down[0] = False
+    w.feed(LP, b"m v=2 2\n"); w.flush()
+    assert sent == ["m v=2 2", "m v=1 1"] and not list(tmp_path.iterdir())
+
+def test_relay_unwritable_spool_drops_points(tmp_path):
+    from lurkkit.relay import RelayWorker, LP
+    (tmp_path / "file").write_text("")
+    def post(payload): raise OSError("upstream down")
+    w = RelayWorker({"spool_dir": str(tmp_path / "file" / "spool")}, post=post)
+    w.feed(LP, b"m v=1 1\nm v=2 2\n"); w.flush()
+    assert w.lost == 2 and w.points_out == 0
+
+# Record & replay
+def test_record_and_replay(tmp_path):
+    from lurkkit.replay import MAGIC, Recorder, Replayer, encode, read_records
+    path = str(tmp_path / "incident.lkrec")
+    rec  = Recorder(path)
+    for i in range(50):
+        rec.record("system", [Metric("system.cpu", {"usage_percent": float(i * 2)}, {"host": HOSTNAME})],
+                   [Alert("high_cpu", "CPU high", Severity.CRITICAL, "system", {"host": HOSTNAME})] if i == 10 else [])
+    rec.close()
+    with open(path, "ab") as f: f.write(b"\x00\x00\x01\x00partial")   # agent killed mid-write
+    records = list(read_records(path))
+    assert len(records) == 50 and records[10][1] == "system" and records[10][3][0].severity == Severity.CRITICAL
+    with open(path, "wb") as f:   # same runs, 60s apart as on the host
+        f.write(MAGIC + b"".join(encode(1_700_000_000 + 60 * i, c, m, a) for i, (_, c, m, a) in enumerate(records)))
+    cfg = deep_merge(DEFAULTS, {"telemetry": {"batch_size": 10}, "alerting": {"cooldown": 120, "slack": {"enabled": True}},
+                                "rules": [{"name": "cpu", "measurement": "system.cpu", "field": "usage_percent", "warning": 90, "for": 120}]})
+    report = Replayer(cfg, speed=None).run(path)
+    assert report["records"] == 50 and report["metrics"] == 50 and report["sink_metrics"] == 50 and report["sink_batches"] == 5
+    # rule pending from run 45, fires at 47 (for: 120s) and repeats at 48, 49; cooldown lets 47 and 49 through
+    assert report["alerts"] == 1 + 3 and report["delivered"] == {"slack": 1 + 2} and report["recorded_span_s"] == 49 * 60